@@ -0,0 +1,259 @@
+import hashlib
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from config.routers import pinned_to_primary
+
+METRICS = ("hit", "miss", "coalesced")
+METRICS_TIMEOUT = 30 * 24 * 60 * 60
+# A response is computed by one request at a time per cache key, the others
+# poll the cache for its result and compute it themselves after the wait.
+FLIGHT_LOCK_TIMEOUT = 30
+FLIGHT_WAIT = 10
+FLIGHT_POLL_INTERVAL = 0.05
+
+
+def version_key(model) -> str:
+    return f"api-cache:version:{model._meta.label_lower}"
+
+
+def modified_key(model) -> str:
+    return f"api-cache:modified:{model._meta.label_lower}"
+
+
+def get_or_init_many(keys: list[str], initial) -> list:
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, initial(), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def get_versions(models) -> list[int]:
+    """
+    Current versions of ``models``. A missing counter starts from the current
+    time, so a counter evicted from the cache never goes back to a version
+    that responses were cached under.
+    """
+    return get_or_init_many([version_key(model) for model in models], time.time_ns)
+
+
+def get_last_modified(models) -> float:
+    """
+    Timestamp of the latest change to ``models``, or the current time if it
+    is not known, so clients refetch rather than keep stale data.
+    """
+    return max(get_or_init_many([modified_key(model) for model in models], time.time))
+
+
+def primary_if_changed(models):
+    """
+    Pins the reads of the block to the primary while a change to ``models``
+    may not have reached the replica yet, within ``REPLICA_PIN_SECONDS``.
+    """
+    if time.time() - get_last_modified(models) < settings.REPLICA_PIN_SECONDS:
+        return pinned_to_primary()
+    return nullcontext()
+
+
+def bump_version(*models):
+    """Invalidates every cached response built from ``models``."""
+    for model in models:
+        key = version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+        cache.set(modified_key(model), time.time(), None)
+
+
+def wait_for(key: str, lock_key: str):
+    """
+    Polls the cache for ``key`` while ``lock_key`` is held, for up to
+    ``FLIGHT_WAIT`` seconds.
+    """
+    deadline = time.monotonic() + FLIGHT_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(FLIGHT_POLL_INTERVAL)
+        if (value := cache.get(key)) is not None:
+            return value
+        if cache.get(lock_key) is None:
+            break
+    return None
+
+
+def request_fingerprint(request, models) -> str:
+    """Hash of the request URL, the response media type and model versions."""
+    raw = "|".join(
+        (
+            request.build_absolute_uri(),
+            request.accepted_media_type,
+            *map(str, get_versions(models)),
+        )
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def invalidate_on_change(*models):
+    """Bumps the version of ``models`` when a row is saved or deleted."""
+
+    def receiver(sender, **kwargs):
+        transaction.on_commit(lambda: bump_version(sender))
+
+    for model in models:
+        for signal in (post_save, post_delete):
+            signal.connect(
+                receiver,
+                sender=model,
+                weak=False,
+                dispatch_uid=f"api-cache:{model._meta.label_lower}",
+            )
+
+
+def incr_counter(key: str, value: int = 1, timeout: int = METRICS_TIMEOUT):
+    """Adds ``value`` to a counter in the cache, starting it from 0."""
+    cache.add(key, 0, timeout)
+    cache.incr(key, value)
+
+
+def record_metric(name: str):
+    incr_counter(f"api-cache:{name}")
+
+
+def get_cache_metrics() -> dict[str, int]:
+    """Hit and miss counters of the API response cache."""
+    values = cache.get_many([f"api-cache:{name}" for name in METRICS])
+    return {name: values.get(f"api-cache:{name}", 0) for name in METRICS}
+
+
+class ResponseCacheMixin:
+    """
+    Caches JSON ``list`` and ``retrieve`` responses under the request URL and
+    the versions of ``cache_models``, so any change to those models misses
+    the cache instead of having to find and delete stale entries. Responses
+    carry an ``X-Cache: HIT`` or ``MISS`` header.
+
+    Concurrent misses of the same key are coalesced: a lock in the cache
+    lets one request build the response while the others wait for it.
+
+    Disabled by ``API_CACHE_TIMEOUT = 0`` and with a per-process cache,
+    which would miss the version bumps of other processes.
+    """
+
+    cache_models = ()
+
+    def get_response_cache_key(self, request) -> str:
+        return f"api-cache:response:{request_fingerprint(request, self.cache_models)}"
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        # The browsable API renders the current user, so only JSON is shared.
+        if (
+            not settings.API_CACHE_TIMEOUT
+            or not settings.API_CACHE_SHARED
+            or request.accepted_renderer.format != "json"
+        ):
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        if (cached := cache.get(key)) is not None:
+            record_metric("hit")
+            return self.cached_hit(cached)
+
+        lock_key = f"{key}:lock"
+        if not cache.add(lock_key, 1, FLIGHT_LOCK_TIMEOUT):
+            if (cached := wait_for(key, lock_key)) is not None:
+                record_metric("coalesced")
+                return self.cached_hit(cached)
+            lock_key = None
+
+        record_metric("miss")
+        return self.build_response(key, lock_key, handler, request, *args, **kwargs)
+
+    def build_response(self, key, lock_key, handler, request, *args, **kwargs):
+        """Runs ``handler`` and caches its response, then releases the lock."""
+
+        def store(response):
+            if response.status_code == 200:
+                cache.set(
+                    key,
+                    (response.content, response["Content-Type"]),
+                    settings.API_CACHE_TIMEOUT,
+                )
+            if lock_key:
+                cache.delete(lock_key)
+
+        try:
+            # A lagging replica would be cached under the new version.
+            with primary_if_changed(self.cache_models):
+                response = handler(request, *args, **kwargs)
+        except BaseException:
+            if lock_key:
+                cache.delete(lock_key)
+            raise
+        response["X-Cache"] = "MISS"
+        if isinstance(response, SimpleTemplateResponse) and response.status_code == 200:
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return response
+
+    def cached_hit(self, cached) -> HttpResponse:
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response["X-Cache"] = "HIT"
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers ``If-None-Match`` and ``If-Modified-Since`` on JSON ``list`` and
+    ``retrieve`` with 304 before the queryset is evaluated. The ETag and
+    Last-Modified come from the version counters of ``cache_models``, so
+    they are only sent when the cache is shared by every process.
+    """
+
+    cache_models = ()
+
+    def get_etag(self, request) -> str:
+        return quote_etag(request_fingerprint(request, self.cache_models)[:32])
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if not settings.API_CACHE_SHARED or request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+
+        etag = self.get_etag(request)
+        last_modified = int(get_last_modified(self.cache_models))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            # The ETag names the current version, so the body must not come
+            # from a replica that has not caught up with it yet.
+            with primary_if_changed(self.cache_models):
+                response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
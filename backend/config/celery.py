@@ -1,9 +1,19 @@
 import os
 
 from celery import Celery
+from celery.signals import worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 app = Celery("backend")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@worker_process_shutdown.connect
+def close_database_connections(**kwargs):
+    # Celery's Django fixup already recycles obsolete connections around
+    # every task, a pool however keeps its connections until it is closed.
+    from config.db import close_all_connections
+
+    close_all_connections()
@@ -0,0 +1,45 @@
+from django.db import connections
+
+
+def get_pool(connection):
+    """The psycopg pool of ``connection``, or None if it is not pooled."""
+    if not connection.settings_dict.get("OPTIONS", {}).get("pool"):
+        return None
+    return connection.pool
+
+
+def pool_metrics() -> dict[str, dict]:
+    """
+    Utilization and wait times of the connection pool of every pooled
+    database in this process, from ``psycopg_pool``'s counters.
+    """
+    metrics = {}
+    for connection in connections.all():
+        if (pool := get_pool(connection)) is None:
+            continue
+        # Counters that are still zero are left out of the stats.
+        stats = pool.get_stats()
+        size, max_size = stats.get("pool_size", 0), stats.get("pool_max", 0)
+        in_use = size - stats.get("pool_available", 0)
+        requests = stats.get("requests_num", 0)
+        wait_ms = stats.get("requests_wait_ms", 0)
+        metrics[connection.alias] = {
+            "size": size,
+            "max_size": max_size,
+            "in_use": in_use,
+            "utilization": round(in_use / max_size, 3) if max_size else 0.0,
+            "requests": requests,
+            "requests_waiting": stats.get("requests_waiting", 0),
+            "requests_queued": stats.get("requests_queued", 0),
+            "requests_errors": stats.get("requests_errors", 0),
+            "avg_wait_ms": round(wait_ms / requests, 3) if requests else 0.0,
+        }
+    return metrics
+
+
+def close_all_connections():
+    """Closes the connections and pools of this process, e.g. on shutdown."""
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if get_pool(connection) is not None:
+            connection.close_pool()
@@ -0,0 +1,202 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("config.requests")
+
+SLOW_QUERY_LIMIT = 50
+
+_current_metrics = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Query, serialization and rendering timings of one request. It is also
+    the ``execute_wrapper`` that counts and times the queries.
+    """
+
+    def __init__(self, keep_queries: bool):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.queries = [] if keep_queries else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.query_count += 1
+            self.db_time += duration
+            if self.queries is not None and len(self.queries) < SLOW_QUERY_LIMIT:
+                self.queries.append(
+                    {
+                        "alias": context["connection"].alias,
+                        "sql": sql,
+                        "ms": round(duration * 1000, 2),
+                    }
+                )
+
+    def instrument(self) -> ExitStack:
+        """
+        Wraps the connections of the current thread, which must also be the
+        one that runs the queries, since connections are thread-local.
+        """
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+@contextmanager
+def measure_serialization():
+    """
+    Adds the duration of the block to the serialization time of the current
+    request, minus the queries of lazily evaluated querysets in it.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    start, db_time = time.perf_counter(), metrics.db_time
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.serialize_time += elapsed - (metrics.db_time - db_time)
+
+
+@cache
+def timed_serializer_class(serializer_class):
+    class TimedSerializer(serializer_class):
+        @property
+        def data(self):
+            with measure_serialization():
+                return super().data
+
+    TimedSerializer.__name__ = serializer_class.__name__
+    TimedSerializer.__qualname__ = serializer_class.__qualname__
+    return TimedSerializer
+
+
+class SerializationTimingMixin:
+    """
+    Viewset mixin that reports the time spent in ``serializer.data`` to
+    :class:`RequestMetricsMiddleware`.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if _current_metrics.get() is not None:
+            serializer.__class__ = timed_serializer_class(type(serializer))
+        return serializer
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures a sample (``REQUEST_METRICS_SAMPLE_RATE``) of requests: the
+    number and time of SQL queries, the serialization and rendering time and
+    the API cache result. They are sent in a ``Server-Timing`` header and
+    logged as JSON, with the queries of requests slower than
+    ``REQUEST_SLOW_MS``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.REQUEST_METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+
+        metrics = RequestMetrics(keep_queries=settings.REQUEST_SLOW_MS > 0)
+        start = time.perf_counter()
+        with metrics.instrument(), self.activate(request, metrics):
+            response = self.get_response(request)
+        return self.report(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.REQUEST_METRICS_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics(keep_queries=settings.REQUEST_SLOW_MS > 0)
+        start = time.perf_counter()
+        # The ORM runs the queries of a request in one thread-sensitive
+        # executor thread, so the connections are wrapped in that thread.
+        stack = await sync_to_async(metrics.instrument)()
+        try:
+            with self.activate(request, metrics):
+                response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.report(request, response, metrics, time.perf_counter() - start)
+
+    @contextmanager
+    def activate(self, request, metrics):
+        request._request_metrics = metrics
+        token = _current_metrics.set(metrics)
+        try:
+            yield
+        finally:
+            _current_metrics.reset(token)
+
+    def process_template_response(self, request, response):
+        # DRF responses are encoded by their renderer right after this hook.
+        if metrics := getattr(request, "_request_metrics", None):
+            start = time.perf_counter()
+
+            def stop(response):
+                metrics.render_time = time.perf_counter() - start
+
+            response.add_post_render_callback(stop)
+        return response
+
+    def report(self, request, response, metrics, total):
+        cache_status = response.get("X-Cache", "")
+        timings = [
+            f"db;dur={metrics.db_time * 1000:.1f};"
+            f'desc="{metrics.query_count} queries"',
+            f"serialize;dur={metrics.serialize_time * 1000:.1f}",
+            f"render;dur={metrics.render_time * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ]
+        if cache_status:
+            timings.append(f'cache;desc="{cache_status}"')
+        response["Server-Timing"] = ", ".join(timings)
+        self.log(request, response, metrics, total, cache_status)
+        return response
+
+    def log(self, request, response, metrics, total, cache_status):
+        slow = settings.REQUEST_SLOW_MS > 0 and total * 1000 >= settings.REQUEST_SLOW_MS
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 1),
+            "db_ms": round(metrics.db_time * 1000, 1),
+            "queries": metrics.query_count,
+            "serialize_ms": round(metrics.serialize_time * 1000, 1),
+            "render_ms": round(metrics.render_time * 1000, 1),
+            "cache": cache_status or None,
+        }
+        if slow:
+            record["slow_queries"] = metrics.queries
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
@@ -0,0 +1,104 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = "replica"
+PIN_COOKIE = "pin_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_pinned = ContextVar("pinned_to_primary", default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Sends the reads of the block to the replica, if one is configured."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def pinned_to_primary(pinned: bool = True):
+    """Keeps the reads of the block on the primary, e.g. after a write."""
+    token = _pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Routes reads to the ``replica`` database inside :func:`replica_reads`,
+    unless the block is pinned to the primary or runs in a transaction on
+    it. Writes and migrations always go to ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            _replica_reads.get()
+            and not _pinned.get()
+            and REPLICA_DB_ALIAS in settings.DATABASES
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Reads safe requests from the replica. A successful write sets a cookie
+    that keeps the client's requests on the primary for
+    ``REPLICA_PIN_SECONDS``, so it reads its own writes despite replica lag.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with pinned_to_primary(PIN_COOKIE in request.COOKIES):
+            if request.method not in SAFE_METHODS:
+                return self.pin(self.get_response(request))
+            with replica_reads():
+                return self.get_response(request)
+
+    async def __acall__(self, request):
+        with pinned_to_primary(PIN_COOKIE in request.COOKIES):
+            if request.method not in SAFE_METHODS:
+                return self.pin(await self.get_response(request))
+            with replica_reads():
+                return await self.get_response(request)
+
+    def pin(self, response):
+        if response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -6,5 +6,10 @@ DATABASES = {
         "NAME": ":memory:",
     }
 }
+CELERY_TASK_ALWAYS_EAGER = True
+# Versions are bumped on commit, which test transactions never reach.
+API_CACHE_TIMEOUT = 0
+# Tests run in a single process, so the local memory cache is shared.
+API_CACHE_SHARED = True
 
 # SPATIALITE_LIBRARY_PATH = "/usr/lib/mod_spatialite.so"  # noqa
@@ -0,0 +1,56 @@
+from django.db.models.fields.files import FieldFile
+
+
+class TrackChangesMixin:
+    """
+    Model mixin that remembers the values of ``tracked_fields`` as they were
+    loaded from or last saved to the database, so ``has_changed()`` can
+    answer without querying the database again.
+
+    Values are kept as they are, except for files, which are kept by name,
+    so tracked fields must hold immutable values.
+    """
+
+    tracked_fields: tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_tracked_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.snapshot_tracked_fields()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.snapshot_tracked_fields()
+
+    def snapshot_tracked_fields(self):
+        deferred = self.get_deferred_fields()
+        self._original_values = {
+            name: self._tracked_value(name)
+            for name in self.tracked_fields
+            if self._meta.get_field(name).attname not in deferred
+        }
+
+    def _tracked_value(self, name: str):
+        value = getattr(self, self._meta.get_field(name).attname)
+        return value.name if isinstance(value, FieldFile) else value
+
+    def get_original(self, name: str, default=None):
+        """Returns the stored value of ``name``, or ``default`` if unknown."""
+        return getattr(self, "_original_values", {}).get(name, default)
+
+    def has_changed(self, *names: str) -> bool:
+        """
+        Whether any of ``names`` (all tracked fields by default) differs from
+        the stored value. Unsaved instances and deferred fields count as
+        changed.
+        """
+        original = getattr(self, "_original_values", {})
+        return any(
+            name not in original or self._tracked_value(name) != original[name]
+            for name in names or self.tracked_fields
+        )
@@ -8,6 +8,9 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from config.views import CacheMetricsView, DatabasePoolMetricsView
+from news.views import resize_news_image
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("summernote/", include("django_summernote.urls")),
@@ -22,8 +25,17 @@ urlpatterns = [
         SpectacularRedocView.as_view(url_name="schema"),
         name="redoc",
     ),
+    path(
+        "api/metrics/db-pool/",
+        DatabasePoolMetricsView.as_view(),
+        name="db-pool-metrics",
+    ),
+    path("api/metrics/cache/", CacheMetricsView.as_view(), name="cache-metrics"),
     path("api/", include("news.urls")),
     path("api/", include("places.urls")),
+    path(
+        "media/resize/<int:pk>/", resize_news_image, name="news-image-resize"
+    ),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,24 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .caching import get_cache_metrics
+from .db import pool_metrics
+
+
+class DatabasePoolMetricsView(APIView):
+    """Connection pool metrics of the process serving the request."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(pool_metrics())
+
+
+class CacheMetricsView(APIView):
+    """Hit, miss and coalesced counters of the API response cache."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(get_cache_metrics())
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django_summernote.admin import SummernoteModelAdmin
 
+from .filters import search_news
 from .models import News
 
 
@@ -11,8 +12,10 @@ class NewsAdmin(SummernoteModelAdmin):
         "title",
         "publication_date",
         "author",
+        "preview_status",
     )
     list_display_links = ("id", "title")
+    list_select_related = ("author",)
     list_filter = ("publication_date", "author")
     search_fields = ("title", "content")
     summernote_fields = "content"
@@ -42,6 +45,9 @@ class NewsAdmin(SummernoteModelAdmin):
         ),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        return search_news(queryset, search_term), False
+
     def save_form(self, request, form, change):
         form.instance.author = request.user
         return super().save_form(request, form, change)
@@ -6,6 +6,12 @@ class NewsConfig(AppConfig):
     name = "news"
 
     def ready(self):
+        from config.caching import invalidate_on_change
+
         import news.signals  # noqa: F401
 
+        from .models import News
+
+        invalidate_on_change(News)
+
         return super().ready()
@@ -0,0 +1,52 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from .models import News, NewsDigest
+
+
+def day_bounds(day: datetime.date) -> tuple[datetime.datetime, datetime.datetime]:
+    """
+    Aware ``[start, end)`` of ``day`` in the current time zone, so lookups
+    are plain ranges over the ``publication_date`` index instead of a cast.
+    """
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, timezone.make_aware(
+        datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min)
+    )
+
+
+def published_on(day: datetime.date):
+    start, end = day_bounds(day)
+    return News.objects.filter(publication_date__gte=start, publication_date__lt=end)
+
+
+def append_to_digest(news_id: int):
+    """Appends the title of a newly published news item to its day digest."""
+    news = News.objects.filter(pk=news_id).values("title", "publication_date").first()
+    if news is None:
+        return
+    day = timezone.localdate(news["publication_date"])
+    with transaction.atomic():
+        NewsDigest.objects.get_or_create(day=day)
+        NewsDigest.objects.filter(day=day).update(
+            body=Concat("body", Value(f"{news['title']}\n")),
+            news_count=F("news_count") + 1,
+            updated_at=timezone.now(),
+        )
+
+
+def rebuild_digest(day: datetime.date) -> NewsDigest:
+    """Rebuilds the digest of ``day`` after edits or deletions."""
+    titles = list(published_on(day).order_by("pk").values_list("title", flat=True))
+    digest, _ = NewsDigest.objects.update_or_create(
+        day=day,
+        defaults={
+            "body": "".join(f"{title}\n" for title in titles),
+            "news_count": len(titles),
+        },
+    )
+    return digest
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connections
+from django.db.models import F, Func, Q, TextField, Value
+from rest_framework.filters import SearchFilter
+
+
+class StripTags(Func):
+    """Replaces HTML tags of a text column with spaces in SQL."""
+
+    function = "regexp_replace"
+    output_field = TextField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, Value("<[^>]*>"), Value(" "), Value("g"), **extra)
+
+
+def news_search_vector():
+    """Weighted vector of the title and the HTML-stripped content."""
+    config = settings.NEWS_SEARCH_CONFIG
+    return SearchVector("title", weight="A", config=config) + SearchVector(
+        StripTags("content"), weight="B", config=config
+    )
+
+
+def search_news(queryset, term: str):
+    """
+    Filters news matching the web-search style ``term`` through the stored
+    ``search_vector``, ranked and with a highlighted ``headline``. Other
+    databases fall back to ``icontains`` on the title and excerpt.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.filter(Q(title__icontains=term) | Q(excerpt__icontains=term))
+
+    query = SearchQuery(
+        term, search_type="websearch", config=settings.NEWS_SEARCH_CONFIG
+    )
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(
+            rank=SearchRank(F("search_vector"), query),
+            headline=SearchHeadline(
+                StripTags("content"),
+                query,
+                config=settings.NEWS_SEARCH_CONFIG,
+                start_sel="<mark>",
+                stop_sel="</mark>",
+                max_words=35,
+                min_words=15,
+            ),
+        )
+        .order_by("-rank", "-id")
+    )
+
+
+class NewsSearchFilter(SearchFilter):
+    """``?q=`` parameter backed by :func:`search_news`."""
+
+    search_param = "q"
+
+    def filter_queryset(self, request, queryset, view):
+        return search_news(queryset, request.query_params.get(self.search_param, ""))
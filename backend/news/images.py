@@ -0,0 +1,71 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import ExifTags, Image, ImageOps
+
+PREVIEW_SIZE = (200, 200)
+ENCODERS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def decode_image(image_file, width: int, height: int = 1) -> Image.Image:
+    """
+    Decodes ``image_file`` once, no larger than needed to fit at least
+    ``width`` x ``height``.
+
+    Images above ``NEWS_IMAGE_MAX_PIXELS`` are rejected before decoding, and
+    JPEGs are downscaled by the decoder itself through ``Image.draft``.
+    """
+    img = Image.open(image_file)
+    if img.width * img.height > settings.NEWS_IMAGE_MAX_PIXELS:
+        raise Image.DecompressionBombError(
+            f"Image size ({img.width}x{img.height} pixels) exceeds the limit of "
+            f"{settings.NEWS_IMAGE_MAX_PIXELS} pixels."
+        )
+
+    orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        img.draft("RGB", (height, width))
+    else:
+        img.draft("RGB", (width, height))
+    return ImageOps.exif_transpose(img).convert("RGB")
+
+
+def encode_image(img: Image.Image, file_format: str, name: str) -> ContentFile:
+    pil_format, options = ENCODERS[file_format]
+    buffer = BytesIO()
+    img.save(buffer, format=pil_format, **options)
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+def make_preview(img: Image.Image) -> ContentFile:
+    """Returns a JPEG thumbnail of ``img`` that fits ``PREVIEW_SIZE``."""
+    preview = img.copy()
+    preview.thumbnail(PREVIEW_SIZE)
+    return encode_image(preview, "jpeg", "preview.jpg")
+
+
+def make_renditions(img: Image.Image) -> dict[str, dict[int, ContentFile]]:
+    """
+    Returns ``{format: {width: file}}`` for every width and format in
+    ``NEWS_IMAGE_RENDITION_WIDTHS`` and ``NEWS_IMAGE_RENDITION_FORMATS``.
+    Widths above the source width collapse into one rendition at the source
+    width, so images are never upscaled.
+    """
+    widths = sorted(
+        {min(width, img.width) for width in settings.NEWS_IMAGE_RENDITION_WIDTHS}
+    )
+    renditions = {
+        file_format: {} for file_format in settings.NEWS_IMAGE_RENDITION_FORMATS
+    }
+    for width in widths:
+        height = max(1, round(img.height * width / img.width))
+        resized = img.resize((width, height), reducing_gap=2.0)
+        for file_format, files in renditions.items():
+            files[width] = encode_image(resized, file_format, f"{width}.{file_format}")
+    return renditions
+
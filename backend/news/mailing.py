@@ -0,0 +1,37 @@
+import datetime
+
+from config.caching import incr_counter
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+METRICS = ("sent", "failed", "retried")
+
+
+def split_recipients(raw: str) -> list[str]:
+    """Comma-separated addresses without blanks and duplicates, in order."""
+    return list(dict.fromkeys(filter(None, map(str.strip, raw.split(",")))))
+
+
+def build_messages(subject: str, body: str, recipients) -> list[EmailMessage]:
+    """One message per recipient, so addresses are not disclosed."""
+    return [
+        EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [recipient])
+        for recipient in recipients
+    ]
+
+
+def metric_key(name: str, day: datetime.date) -> str:
+    return f"news-email:{day.isoformat()}:{name}"
+
+
+def record_metric(name: str, value: int = 1):
+    incr_counter(metric_key(name, timezone.localdate()), value)
+
+
+def get_delivery_metrics(day: datetime.date | None = None) -> dict[str, int]:
+    """Daily counters of delivered, failed and retried messages."""
+    day = day or timezone.localdate()
+    values = cache.get_many([metric_key(name, day) for name in METRICS])
+    return {name: values.get(metric_key(name, day), 0) for name in METRICS}
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:30
+
+from django.db import migrations, models
+
+
+def mark_existing_previews(apps, schema_editor):
+    News = apps.get_model("news", "News")
+    News.objects.exclude(preview_image="").exclude(preview_image=None).update(
+        preview_status="ready"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='preview_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', editable=False, max_length=10),
+        ),
+        migrations.RunPython(mark_existing_previews, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_news_preview_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
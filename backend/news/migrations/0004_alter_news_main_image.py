@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:20
+
+import news.storage
+import news.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_news_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='news',
+            name='main_image',
+            field=models.ImageField(storage=news.storage.ContentAddressedStorage(), upload_to=news.utils.upload_to_image),
+        ),
+    ]
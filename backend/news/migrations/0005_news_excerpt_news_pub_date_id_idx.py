@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+from news.utils import make_excerpt
+
+
+def fill_excerpts(apps, schema_editor):
+    News = apps.get_model("news", "News")
+    batch = []
+    for news in News.objects.only("content").iterator(chunk_size=500):
+        news.excerpt = make_excerpt(news.content)
+        batch.append(news)
+        if len(batch) >= 500:
+            News.objects.bulk_update(batch, ["excerpt"])
+            batch = []
+    News.objects.bulk_update(batch, ["excerpt"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_alter_news_main_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['-publication_date', '-id'], name='news_pub_date_id_idx'),
+        ),
+    ]
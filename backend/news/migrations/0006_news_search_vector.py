@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from news.filters import news_search_vector
+
+INDEX_NAME = "news_search_vector_idx"
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    News = apps.get_model("news", "News")
+    News.objects.update(search_vector=news_search_vector())
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON news_news "
+        "USING gin (search_vector)"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_excerpt_news_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='news',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='news_search_vector_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_index, drop_search_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('body', models.TextField(blank=True)),
+                ('news_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
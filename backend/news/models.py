@@ -1,13 +1,72 @@
+from config.tracking import TrackChangesMixin
 from django.contrib.auth.models import User
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models
 
-from .utils import upload_to_image
+from .filters import news_search_vector
+from .storage import image_storage
+from .utils import make_excerpt, upload_to_image
 
 
-class News(models.Model):
+class News(TrackChangesMixin, models.Model):
+    class PreviewStatus(models.TextChoices):
+        PENDING = "pending", "Pending"
+        READY = "ready", "Ready"
+        FAILED = "failed", "Failed"
+
     title = models.CharField(max_length=255)
-    main_image = models.ImageField(upload_to=upload_to_image)
+    main_image = models.ImageField(upload_to=upload_to_image, storage=image_storage)
     preview_image = models.ImageField(upload_to=upload_to_image, blank=True, null=True)
+    preview_status = models.CharField(
+        max_length=10,
+        choices=PreviewStatus,
+        default=PreviewStatus.PENDING,
+        editable=False,
+    )
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     content = models.TextField()
+    excerpt = models.TextField(blank=True, editable=False)
     publication_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    tracked_fields = ("main_image", "title", "content")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-publication_date", "-id"], name="news_pub_date_id_idx"
+            ),
+            # Created on PostgreSQL only, see migration 0006.
+            GinIndex(fields=["search_vector"], name="news_search_vector_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        saved = {"title", "content"}
+        if update_fields is not None:
+            saved &= set(update_fields)
+
+        if "content" in saved and self.has_changed("content"):
+            self.excerpt = make_excerpt(self.content)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "excerpt"}
+        search_changed = bool(saved) and self.has_changed(*saved)
+        super().save(*args, **kwargs)
+        if search_changed:
+            self.update_search_vector()
+
+    def update_search_vector(self):
+        if connections[self._state.db].vendor == "postgresql":
+            News.objects.filter(pk=self.pk).update(search_vector=news_search_vector())
+
+
+class NewsDigest(models.Model):
+    day = models.DateField(unique=True)
+    body = models.TextField(blank=True)
+    news_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Digest for {self.day}"
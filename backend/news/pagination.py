@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NewsCursorPagination(CursorPagination):
+    """
+    Stable pages over the ``(publication_date, id)`` index, or by relevance
+    for ranked search results.
+    """
+
+    ordering = ("-publication_date", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        if "rank" in queryset.query.annotations:
+            return ("-rank", "-id")
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,113 @@
+import bisect
+import fcntl
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from .images import decode_image, encode_image
+
+RESIZE_FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+LOCK_NAME = ".lock"
+
+
+def parse_resize_params(params) -> tuple[int | None, int | None, str]:
+    """
+    Returns ``(width, height, format)`` from the ``w``, ``h`` and ``format``
+    query parameters, raising ``ValueError`` for invalid values. Sizes are
+    rounded up to ``NEWS_IMAGE_RESIZE_SIZES``, which bounds the number of
+    renditions of an image.
+    """
+    file_format = params.get("format", "webp")
+    if file_format not in RESIZE_FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+    max_size = settings.NEWS_IMAGE_RESIZE_MAX
+    size = []
+    for param in ("w", "h"):
+        value = params.get(param)
+        if value is None:
+            size.append(None)
+            continue
+        if not value.isdigit() or not 0 < int(value) <= max_size:
+            raise ValueError(f"{param} must be between 1 and {max_size}.")
+        size.append(snap_size(int(value)))
+
+    if size == [None, None]:
+        raise ValueError("w or h is required.")
+    return size[0], size[1], file_format
+
+
+def snap_size(value: int) -> int:
+    sizes = settings.NEWS_IMAGE_RESIZE_SIZES
+    return sizes[min(bisect.bisect_left(sizes, value), len(sizes) - 1)]
+
+
+def rendition_key(image_name: str, width, height, file_format: str) -> str:
+    raw = f"{image_name}|{width}|{height}|{file_format}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def rendition_path(key: str, file_format: str) -> Path:
+    cache_dir = Path(settings.NEWS_IMAGE_RESIZE_CACHE_DIR)
+    return cache_dir / key[:2] / f"{key}.{file_format}"
+
+
+def render(image_file, width, height, file_format: str) -> bytes:
+    max_size = settings.NEWS_IMAGE_RESIZE_MAX
+    with image_file.open("rb"):
+        img = decode_image(image_file, width or 1, height or 1)
+    img.thumbnail((width or max_size, height or max_size), reducing_gap=2.0)
+    return encode_image(img, file_format, "").read()
+
+
+def get_or_create_rendition(image_file, key: str, width, height, file_format):
+    """
+    Returns the cached rendition path, rendering it on a miss.
+
+    Concurrent misses are single-flighted with an exclusive ``flock`` on a
+    lock file per cache subdirectory, which is never deleted: the first
+    request renders, the others wait and reuse its file. Hits refresh the
+    file mtime, which drives the LRU eviction of :func:`evict`.
+    """
+    path = rendition_path(key, file_format)
+    if path.exists():
+        os.utime(path)
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.parent / LOCK_NAME, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if path.exists():
+            return path
+
+        data = render(image_file, width, height, file_format)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as output:
+            output.write(data)
+        os.replace(output.name, path)
+    return path
+
+
+def evict(cache_dir: Path, max_bytes: int):
+    """
+    Deletes the least recently used renditions until the cache fits. It
+    scans the whole cache, so it runs periodically outside of requests.
+    """
+    files = []
+    for path in cache_dir.glob("*/*"):
+        if path.suffix.lstrip(".") not in RESIZE_FORMATS:
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
@@ -1,9 +1,49 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 
 from .models import News
 
 
-class NewsSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Limits the output of read requests to the comma-separated ``?fields=``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        if fields := request.query_params.get("fields"):
+            requested = set(fields.split(","))
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
+class NewsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = News
-        fields = "__all__"
+        exclude = ("search_vector",)
+        read_only_fields = ("preview_image",)
+
+    def get_renditions(self, obj) -> dict[str, dict[str, str]]:
+        """``srcset``-style ``{format: {width: url}}`` map of the renditions."""
+        request = self.context.get("request")
+        urls = {}
+        for file_format, names in obj.renditions.items():
+            urls[file_format] = {}
+            for width, name in names.items():
+                url = default_storage.url(name)
+                urls[file_format][width] = (
+                    request.build_absolute_uri(url) if request else url
+                )
+        return urls
+
+
+class NewsListSerializer(NewsSerializer):
+    rank = serializers.FloatField(read_only=True, default=None)
+    headline = serializers.CharField(read_only=True, default=None)
+
+    class Meta(NewsSerializer.Meta):
+        exclude = ("content", "search_vector")
@@ -1,47 +1,69 @@
-from io import BytesIO
+from functools import partial
 
-from django.core.files.base import ContentFile
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from PIL import Image
+from django.utils import timezone
 
+from .digest import append_to_digest, rebuild_digest
 from .models import News
+from .tasks import schedule_preview
 
 
 @receiver(pre_save, sender=News)
 def news_pre_save(sender, instance, **kwargs):
-    if not instance.pk:
-        return
+    image = instance.main_image
+    if image and not image._committed:
+        # Store the upload now so that its content-addressed name is known.
+        image.save(image.name, image.file, save=False)
 
-    try:
-        old_instance = News.objects.get(pk=instance.pk)
-    except News.DoesNotExist:
+    # Replaced images are deleted by sweep_unused_images once unused.
+    if instance._state.adding or not instance.has_changed("main_image"):
         return
 
-    if old_instance.main_image != instance.main_image:
-        if old_instance.preview_image:
-            old_instance.preview_image.delete(save=False)
+    instance.preview_image = None
+    instance.renditions = {}
+    instance.preview_status = News.PreviewStatus.PENDING
+
+
+@receiver(post_save, sender=News)
+def news_digest_post_save(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(append_to_digest, instance.pk))
+    elif instance.has_changed("title"):
+        day = timezone.localdate(instance.publication_date)
+        transaction.on_commit(partial(rebuild_digest, day))
 
 
 @receiver(post_save, sender=News)
 def news_post_save(sender, instance, created, **kwargs):
-    if hasattr(instance, "_preview_generated"):
-        return
     if not instance.main_image:
         return
+    if instance.preview_status != News.PreviewStatus.PENDING:
+        return
 
-    try:
-        img = Image.open(instance.main_image)
-        img.thumbnail((200, 200))
-        buffer = BytesIO()
-        img.save(buffer, format="JPEG")
-        buffer.seek(0)
-
-        instance.preview_image.save(
-            "preview.jpg", ContentFile(buffer.read()), save=False
+    shared = (
+        News.objects.filter(
+            main_image=instance.main_image.name,
+            preview_status=News.PreviewStatus.READY,
         )
-        instance._preview_generated = True
+        .values("preview_image", "renditions")
+        .first()
+    )
+    if shared is None:
+        schedule_preview(instance)
+        return
+
+    # Another news item already has previews of the same blob.
+    News.objects.filter(pk=instance.pk).update(
+        **shared, preview_status=News.PreviewStatus.READY
+    )
+    instance.preview_image = shared["preview_image"]
+    instance.renditions = shared["renditions"]
+    instance.preview_status = News.PreviewStatus.READY
+
 
-        News.objects.filter(pk=instance.pk).update(preview_image=instance.preview_image)
-    except Exception as e:
-        print(f"Error generating preview: {e}")
+@receiver(post_delete, sender=News)
+def news_post_delete(sender, instance, **kwargs):
+    day = timezone.localdate(instance.publication_date)
+    transaction.on_commit(partial(rebuild_digest, day))
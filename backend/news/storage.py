@@ -0,0 +1,63 @@
+import hashlib
+import os
+from pathlib import PurePosixPath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.deconstruct import deconstructible
+
+
+def file_digest(content: File) -> str:
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores files under the SHA-256 of their content, so identical uploads
+    share one file: ``news/photo.jpg`` becomes ``news/ab/ab12….jpg`` and an
+    existing blob is never written again.
+
+    Storing an existing blob renews its modification time, which keeps it
+    from :func:`news.tasks.sweep_unused_images` while the news item that
+    reuses it may not be committed yet.
+    """
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        digest = file_digest(content)
+        path = PurePosixPath(name)
+        name = str(path.parent / digest[:2] / f"{digest}{path.suffix.lower()}")
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+
+image_storage = ContentAddressedStorage()
+
+
+def derived_name(image_name: str, filename: str) -> str:
+    """Deterministic name of a file derived from an image blob."""
+    return f"{PurePosixPath(image_name).with_suffix('')}/{filename}"
+
+
+def save_derived(image_name: str, file: File) -> str:
+    """Stores ``file`` next to the image blob unless it already exists."""
+    name = derived_name(image_name, file.name)
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, file)
+
+
+def delete_derived(image_name: str):
+    directory = derived_name(image_name, "")
+    if not default_storage.exists(directory):
+        return
+    for filename in default_storage.listdir(directory)[1]:
+        default_storage.delete(f"{directory}{filename}")
@@ -1,25 +1,201 @@
-from datetime import date
+import datetime
+from collections.abc import Iterator
+from itertools import batched
+from pathlib import Path
+from smtplib import SMTPException
 
-from celery import shared_task
+from celery import group, shared_task
+from config.caching import bump_version
 from constance import config
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
 
-from .models import News
+from .digest import rebuild_digest
+from .images import decode_image, make_preview, make_renditions
+from .mailing import build_messages, record_metric, split_recipients
+from .models import News, NewsDigest
+from .resize import evict
+from .storage import delete_derived, image_storage, save_derived
+
+PREVIEW_LOCK_TIMEOUT = 10 * 60
+IMAGE_DIR = "news"
+SWEEP_BATCH_SIZE = 500
 
 
 @shared_task
 def send_news_email():
-    today_news = News.objects.filter(publication_date__date=date.today())
-    if not today_news:
+    today = timezone.localdate()
+    # The digest is appended to as news is published, it is only built here
+    # for days that started before it existed.
+    digest = NewsDigest.objects.filter(day=today).first() or rebuild_digest(today)
+    if not digest.news_count:
+        return
+
+    message = f"{config.EMAIL_MESSAGE}\n\n{digest.body.rstrip()}"
+
+    recipients = split_recipients(config.EMAIL_RECIPIENTS)
+    chunks = list(batched(recipients, settings.NEWS_EMAIL_CHUNK_SIZE))
+    group(
+        send_news_email_chunk.s(config.EMAIL_SUBJECT, message, list(chunk))
+        for chunk in chunks
+    ).apply_async()
+    return f"Daily news email queued in {len(chunks)} chunks"
+
+
+@shared_task(
+    bind=True,
+    max_retries=3,
+    default_retry_delay=60,
+    rate_limit=settings.NEWS_EMAIL_RATE_LIMIT,
+)
+def send_news_email_chunk(self, subject: str, body: str, recipients: list[str]):
+    """
+    Sends one chunk of the daily email over a single SMTP connection and
+    returns the number of messages delivered by this attempt. On SMTP errors
+    only the recipients that were not reached yet are retried.
+    """
+    sent = attempted = 0
+    try:
+        with get_connection() as connection:
+            for message in build_messages(subject, body, recipients):
+                sent += connection.send_messages([message])
+                attempted += 1
+    except (SMTPException, OSError) as exc:
+        record_metric("sent", sent)
+        # Closing the connection may fail after every message went out.
+        if not (remaining := recipients[attempted:]):
+            return sent
+        if self.request.retries >= self.max_retries:
+            record_metric("failed", len(remaining))
+            raise
+        record_metric("retried", len(remaining))
+        raise self.retry(exc=exc, args=(subject, body, remaining))
+
+    record_metric("sent", sent)
+    return sent
+
+
+def preview_lock_key(image_name: str) -> str:
+    return f"news-preview:{image_name}"
+
+
+def schedule_preview(news: News):
+    """
+    Enqueues preview generation once the current transaction commits. Saves
+    of the same image, by any news item, while its task is still queued are
+    coalesced into it.
+    """
+    image_name = news.main_image.name
+
+    def enqueue():
+        if cache.add(preview_lock_key(image_name), True, PREVIEW_LOCK_TIMEOUT):
+            generate_news_preview.delay(image_name)
+
+    transaction.on_commit(enqueue)
+
+
+@shared_task
+def evict_resize_cache():
+    evict(
+        Path(settings.NEWS_IMAGE_RESIZE_CACHE_DIR),
+        settings.NEWS_IMAGE_RESIZE_CACHE_SIZE,
+    )
+
+
+def iter_image_blobs() -> Iterator[str]:
+    """Names of the image blobs, derived files are in directories below them."""
+    if not image_storage.exists(IMAGE_DIR):
         return
+    for prefix in image_storage.listdir(IMAGE_DIR)[0]:
+        directory = f"{IMAGE_DIR}/{prefix}"
+        for filename in image_storage.listdir(directory)[1]:
+            yield f"{directory}/{filename}"
 
-    news_titles = "\n".join(news.title for news in today_news)
-    message = f"{config.EMAIL_MESSAGE}\n\n{news_titles}"
 
-    send_mail(
-        subject=config.EMAIL_SUBJECT,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=config.EMAIL_RECIPIENTS.split(","),
+@shared_task
+def sweep_unused_images() -> int:
+    """
+    Deletes the image blobs no news item references, with the files derived
+    from them, and returns their number.
+
+    Blobs stored or reused within ``NEWS_IMAGE_SWEEP_GRACE`` seconds are
+    kept: the transaction saving a news item with them may still be open,
+    so a reference check right after another item let go of them would race
+    with it.
+    """
+    cutoff = timezone.now() - datetime.timedelta(
+        seconds=settings.NEWS_IMAGE_SWEEP_GRACE
+    )
+    candidates = (
+        name
+        for name in iter_image_blobs()
+        if image_storage.get_modified_time(name) < cutoff
+    )
+    deleted = 0
+    for batch in batched(candidates, SWEEP_BATCH_SIZE):
+        used = set(
+            News.objects.filter(main_image__in=batch).values_list(
+                "main_image", flat=True
+            )
+        )
+        for name in set(batch) - used:
+            image_storage.delete(name)
+            delete_derived(name)
+            deleted += 1
+    return deleted
+
+
+def render_previews(pending, image_name: str) -> dict | None:
+    """
+    Decodes the image of the first ``pending`` news item once and stores its
+    preview and renditions, returning the fields that reference them.
+    """
+    news = pending.first()
+    if news is None:
+        return None
+
+    try:
+        img = decode_image(news.main_image, max(settings.NEWS_IMAGE_RENDITION_WIDTHS))
+        preview = make_preview(img)
+        renditions = make_renditions(img)
+    except Exception as exc:
+        print(f"Error generating preview for image {image_name}: {exc}")
+        pending.update(preview_status=News.PreviewStatus.FAILED)
+        bump_version(News)
+        return None
+
+    return {
+        "preview_image": save_derived(image_name, preview),
+        "renditions": {
+            file_format: {
+                str(width): save_derived(image_name, file)
+                for width, file in files.items()
+            }
+            for file_format, files in renditions.items()
+        },
+        "preview_status": News.PreviewStatus.READY,
+    }
+
+
+@shared_task
+def generate_news_preview(image_name: str):
+    """
+    Builds the preview and every rendition of an image from a single decode
+    and stores them on every news item that is waiting for them.
+    """
+    pending = News.objects.filter(
+        main_image=image_name, preview_status=News.PreviewStatus.PENDING
     )
+    try:
+        fields = render_previews(pending, image_name)
+    finally:
+        cache.delete(preview_lock_key(image_name))
+    # Updated after the lock is released, so items saved with the image while
+    # it was held, which did not enqueue a task, are included.
+    if fields is None or not pending.update(**fields):
+        return None
+    bump_version(News)
+    return fields["preview_image"]
@@ -1,21 +1,49 @@
+import datetime
+import fcntl
+import hashlib
+import os
 from io import BytesIO
+from smtplib import SMTPException
 
 import pytest
 from constance import config
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core import mail
+from django.core.mail import get_connection
+from django.core.cache import cache
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import Value
+from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 from PIL import Image
 from rest_framework.test import APIClient
 
-from .models import News
+from .images import decode_image, make_preview, make_renditions
+from .mailing import get_delivery_metrics
+from .digest import day_bounds, published_on
+from .models import News, NewsDigest
+from .pagination import NewsCursorPagination
+from .resize import (
+    evict,
+    get_or_create_rendition,
+    parse_resize_params,
+    rendition_key,
+    rendition_path,
+)
 from .signals import news_post_save, news_pre_save
-from .tasks import send_news_email
+from .storage import image_storage
+from .tasks import (
+    generate_news_preview,
+    preview_lock_key,
+    schedule_preview,
+    send_news_email,
+    send_news_email_chunk,
+    sweep_unused_images,
+)
 
 
 # ============================================================
@@ -55,6 +83,13 @@ def test_uploaded_file(test_image_bytes):
     return SimpleUploadedFile("test.jpg", test_image_bytes, content_type="image/jpeg")
 
 
+@pytest.fixture
+def media_root(tmp_path):
+    """Отдельный MEDIA_ROOT, чтобы очистка видела только файлы теста."""
+    with override_settings(MEDIA_ROOT=str(tmp_path)):
+        yield tmp_path
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -109,34 +144,124 @@ class TestNewsSignals:
         )
         news_pre_save(News, news)  # Если ошибка не возникает – всё ок.
 
-    def test_news_pre_save_instance_not_found(
-        self, default_test_user, monkeypatch, test_content_file
+    def test_news_pre_save_same_image_without_queries(
+        self, default_test_user, test_content_file, django_assert_num_queries
     ):
         """
-        Если получение предыдущей версии объекта вызывает News.DoesNotExist,
-        сигнал pre_save завершается без ошибок.
+        Повторная загрузка того же изображения не считается изменением,
+        а сигнал pre_save не обращается к базе данных.
         """
         news = News.objects.create(
             title="Existing News",
             content="Initial content",
             author=default_test_user,
             main_image=test_content_file,
-            preview_image=test_content_file,
         )
-        news.main_image = test_content_file
-        monkeypatch.setattr(
-            News.objects,
-            "get",
-            lambda **kwargs: (_ for _ in ()).throw(News.DoesNotExist),
+        News.objects.filter(pk=news.pk).update(preview_status=News.PreviewStatus.READY)
+        news = News.objects.get(pk=news.pk)
+        news.main_image = ContentFile(generate_test_image_bytes(), name="again.jpg")
+        with django_assert_num_queries(0):
+            news_pre_save(News, news)
+        assert not news.has_changed("main_image")
+        assert news.preview_status == News.PreviewStatus.READY
+
+    def test_sweep_deletes_replaced_image(
+        self, media_root, default_test_user, django_capture_on_commit_callbacks
+    ):
+        """
+        После замены main_image старый файл и его превью удаляются очисткой,
+        когда на них больше не ссылается ни одна новость и истёк срок ожидания.
+        """
+        with django_capture_on_commit_callbacks(execute=True):
+            news = News.objects.create(
+                title="Test News",
+                content="Test content",
+                author=default_test_user,
+                main_image=ContentFile(
+                    generate_test_image_bytes(color="green"), name="old.jpg"
+                ),
+            )
+        news.refresh_from_db()
+        old_image, old_preview = news.main_image.name, news.preview_image.name
+        assert image_storage.exists(old_image)
+        assert default_storage.exists(old_preview)
+
+        news.main_image = ContentFile(
+            generate_test_image_bytes(color="red"), name="new.jpg"
         )
-        news_pre_save(News, news)
-
-    def test_news_pre_save_deletes_old_preview(
-        self, default_test_user, monkeypatch, test_content_file
+        with django_capture_on_commit_callbacks(execute=True):
+            news.save()
+        assert sweep_unused_images() == 0, "Файл удалён до истечения ожидания"
+        assert image_storage.exists(old_image)
+
+        with override_settings(NEWS_IMAGE_SWEEP_GRACE=-1):
+            assert sweep_unused_images() == 1
+        assert not image_storage.exists(old_image), "Старый файл не удалён"
+        assert not default_storage.exists(old_preview), "Старое превью не удалено"
+        assert image_storage.exists(news.main_image.name)
+
+    def test_reused_image_is_kept_by_sweep(
+        self, media_root, news_item, test_image_bytes
     ):
         """
-        При обновлении main_image, если старая версия имеет preview_image,
-        должна быть вызвана функция delete() у старого preview_image.
+        Повторное сохранение того же файла продлевает срок ожидания, пока
+        новость, которая его использует, может быть ещё не закоммичена.
+        """
+        name = news_item.main_image.name
+        News.objects.filter(pk=news_item.pk).delete()
+        old = timezone.now() - datetime.timedelta(hours=2)
+        os.utime(image_storage.path(name), (old.timestamp(), old.timestamp()))
+        content = ContentFile(test_image_bytes, name="again.jpg")
+        assert image_storage.save("news/again.jpg", content) == name
+        assert sweep_unused_images() == 0
+        assert image_storage.exists(name)
+
+    def test_identical_uploads_share_blob(
+        self, media_root, user_a, user_b, django_capture_on_commit_callbacks
+    ):
+        """
+        Одинаковые изображения хранятся одним файлом по хешу содержимого
+        и используют одни и те же превью без повторной генерации.
+        """
+        image_bytes = generate_test_image_bytes(color="purple")
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        with django_capture_on_commit_callbacks(execute=True):
+            first = News.objects.create(
+                title="First",
+                content="Content",
+                author=user_a,
+                main_image=ContentFile(image_bytes, name="photo.JPG"),
+            )
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            second = News.objects.create(
+                title="Second",
+                content="Content",
+                author=user_b,
+                main_image=ContentFile(image_bytes, name="copy.jpg"),
+            )
+        assert callbacks == [], "Превью не должно генерироваться повторно"
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert first.main_image.name == f"news/{digest[:2]}/{digest}.jpg"
+        assert second.main_image.name == first.main_image.name
+        assert second.preview_status == News.PreviewStatus.READY
+        assert second.preview_image == first.preview_image
+        assert second.renditions == first.renditions
+
+        with django_capture_on_commit_callbacks(execute=True):
+            first.delete()
+        with override_settings(NEWS_IMAGE_SWEEP_GRACE=-1):
+            sweep_unused_images()
+        assert image_storage.exists(second.main_image.name)
+        assert default_storage.exists(second.preview_image.name)
+
+    def test_news_pre_save_resets_preview_status(
+        self, default_test_user, test_content_file
+    ):
+        """
+        При замене main_image статус превью сбрасывается в pending,
+        а ссылка на старое превью очищается.
         """
         news = News.objects.create(
             title="Test News",
@@ -145,44 +270,39 @@ class TestNewsSignals:
             main_image=test_content_file,
             preview_image=test_content_file,
         )
-        old_preview = news.preview_image
-        assert old_preview, "Изначально preview не создан"
-        assert default_storage.exists(old_preview.name), (
-            "Файл preview отсутствует в хранилище"
+        News.objects.filter(pk=news.pk).update(preview_status=News.PreviewStatus.READY)
+        news.refresh_from_db()
+        news.main_image = ContentFile(
+            generate_test_image_bytes(color="red"), name="new.jpg"
         )
-
-        news.main_image = test_content_file
-        old_instance = News.objects.get(pk=news.pk)
-        delete_called = False
-
-        def fake_delete(save):
-            nonlocal delete_called
-            delete_called = True
-
-        monkeypatch.setattr(old_instance.preview_image, "delete", fake_delete)
-        monkeypatch.setattr(News.objects, "get", lambda **kwargs: old_instance)
         news_pre_save(News, news)
-        assert delete_called, "delete() не был вызван для старого preview_image"
+        assert news.preview_status == News.PreviewStatus.PENDING
+        assert not news.preview_image
 
     def test_news_post_save_generates_preview(
-        self, default_test_user, test_uploaded_file
+        self, default_test_user, test_uploaded_file, django_capture_on_commit_callbacks
     ):
         """
-        Если присутствует main_image, сигнал post_save должен создать preview_image.
+        Превью генерируется задачей Celery только после коммита транзакции.
         """
-        news = News.objects.create(
-            title="Test News",
-            content="Test content",
-            author=default_test_user,
-            main_image=test_uploaded_file,
-        )
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            news = News.objects.create(
+                title="Test News",
+                content="Test content",
+                author=default_test_user,
+                main_image=test_uploaded_file,
+            )
+            assert not news.preview_image, "Превью создано внутри запроса"
+        assert len(callbacks) == 2, "Ожидались задача превью и запись в дайджест"
+
+        news.refresh_from_db()
+        assert news.preview_status == News.PreviewStatus.READY
         assert news.preview_image, "Preview не был создан"
         assert default_storage.exists(news.preview_image.name), (
             "Файл preview отсутствует в хранилище"
         )
-        assert getattr(news, "_preview_generated", False), (
-            "_preview_generated не установлен"
-        )
+        with Image.open(news.preview_image) as preview:
+            assert max(preview.size) <= 200
 
     def test_news_post_save_no_main_image(self, default_test_user):
         """
@@ -197,24 +317,239 @@ class TestNewsSignals:
         news_post_save(News, news, created=False)
         assert not news.preview_image, "Preview создан, хотя main_image отсутствует"
 
-    def test_news_post_save_already_generated(
-        self, default_test_user, test_uploaded_file
+    def test_news_post_save_preview_ready(
+        self, news_item, django_capture_on_commit_callbacks
     ):
         """
-        Если флаг _preview_generated уже установлен, preview_image не должен изменяться.
+        Если превью уже готово, повторное сохранение не ставит задачу.
         """
-        news = News.objects.create(
-            title="Test News",
-            content="Test content",
-            author=default_test_user,
-            main_image=test_uploaded_file,
+        news_item.preview_status = News.PreviewStatus.READY
+        with django_capture_on_commit_callbacks() as callbacks:
+            news_item.save()
+        assert callbacks == []
+
+
+# endregion
+
+
+# ============================================================
+#                          PREVIEW TASKS TESTS
+# ============================================================
+# region Preview Tasks Tests
+@pytest.mark.django_db
+class TestNewsPreviewTask:
+    def test_duplicate_tasks_are_coalesced(
+        self, news_item, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        """
+        Несколько сохранений одного изображения, в том числе разными
+        новостями, ставят одну задачу, которая обновляет все эти новости.
+        """
+        cache.clear()
+        delayed = []
+        monkeypatch.setattr(
+            generate_news_preview, "delay", lambda *args: delayed.append(args)
         )
-        news._preview_generated = True
-        prev_preview = news.preview_image
-        news_post_save(News, news, created=False)
-        assert news.preview_image == prev_preview, (
-            "Preview изменился, несмотря на установленный флаг"
+        other = News.objects.create(
+            title="Other",
+            content="Content",
+            author=news_item.author,
+            main_image=news_item.main_image.name,
         )
+        with django_capture_on_commit_callbacks(execute=True):
+            schedule_preview(news_item)
+            schedule_preview(news_item)
+            schedule_preview(other)
+        assert delayed == [(news_item.main_image.name,)]
+        cache.clear()
+
+        generate_news_preview(news_item.main_image.name)
+        news_item.refresh_from_db()
+        other.refresh_from_db()
+        assert news_item.preview_status == News.PreviewStatus.READY
+        assert other.preview_status == News.PreviewStatus.READY
+        assert other.preview_image == news_item.preview_image
+
+    def test_lock_is_released(self, news_item):
+        """После выполнения задачи блокировка снимается."""
+        key = preview_lock_key(news_item.main_image.name)
+        cache.set(key, True)
+        generate_news_preview(news_item.main_image.name)
+        assert cache.get(key) is None
+
+    def test_stale_image_is_skipped(self, news_item):
+        """Задача для уже заменённого изображения ничего не делает."""
+        assert generate_news_preview("news/old.jpg") is None
+        news_item.refresh_from_db()
+        assert news_item.preview_status == News.PreviewStatus.PENDING
+
+    def test_broken_image_marks_failed(self, news_item, monkeypatch):
+        """Ошибка декодирования переводит превью в статус failed."""
+
+        def broken_preview(image_file):
+            raise OSError("cannot identify image file")
+
+        monkeypatch.setattr("news.tasks.make_preview", broken_preview)
+        assert generate_news_preview(news_item.main_image.name) is None
+        news_item.refresh_from_db()
+        assert news_item.preview_status == News.PreviewStatus.FAILED
+
+    def test_make_preview_converts_to_jpeg(self):
+        """PNG с прозрачностью сохраняется как JPEG-превью."""
+        buffer = BytesIO()
+        Image.new("RGBA", (800, 400)).save(buffer, format="PNG")
+        preview = make_preview(decode_image(BytesIO(buffer.getvalue()), 1280))
+        with Image.open(preview) as img:
+            assert img.format == "JPEG"
+            assert img.size == (200, 100)
+
+    def test_decode_image_uses_jpeg_draft(self):
+        """Большой JPEG уменьшается ещё при декодировании."""
+        image = decode_image(BytesIO(generate_test_image_bytes(size=(4000, 3000))), 640)
+        assert image.mode == "RGB"
+        assert 640 <= image.width < 4000
+
+    @override_settings(NEWS_IMAGE_MAX_PIXELS=100)
+    def test_decode_image_rejects_bombs(self):
+        """Изображения сверх лимита пикселей не декодируются."""
+        with pytest.raises(Image.DecompressionBombError):
+            decode_image(BytesIO(generate_test_image_bytes()), 640)
+
+    @override_settings(
+        NEWS_IMAGE_RENDITION_WIDTHS=(50, 80, 320),
+        NEWS_IMAGE_RENDITION_FORMATS=("webp", "jpeg"),
+    )
+    def test_make_renditions(self):
+        """Рендишены не увеличивают изображение и кодируются в оба формата."""
+        image = decode_image(BytesIO(generate_test_image_bytes()), 320)
+        renditions = make_renditions(image)
+        assert {fmt: sorted(files) for fmt, files in renditions.items()} == {
+            "webp": [50, 80, 100],
+            "jpeg": [50, 80, 100],
+        }
+        with Image.open(renditions["webp"][50]) as img:
+            assert img.format == "WEBP"
+            assert img.size == (50, 50)
+
+    @override_settings(NEWS_IMAGE_RENDITION_WIDTHS=(50,))
+    def test_renditions_are_exposed(self, api_client, news_item):
+        """Задача сохраняет рендишены, а API отдаёт их как srcset-карту."""
+        generate_news_preview(news_item.main_image.name)
+        news_item.refresh_from_db()
+        assert news_item.preview_status == News.PreviewStatus.READY
+        for names in news_item.renditions.values():
+            assert default_storage.exists(names["50"])
+
+        response = api_client.get(reverse("news-detail", args=[news_item.id]))
+        renditions = response.data["renditions"]
+        assert set(renditions) == {"webp", "jpeg"}
+        assert renditions["webp"]["50"].startswith("http://testserver/media/")
+
+    def test_api_exposes_preview_status(self, api_client, news_item):
+        """API отдаёт статус генерации превью."""
+        response = api_client.get(reverse("news-detail", args=[news_item.id]))
+        assert response.data["preview_status"] == News.PreviewStatus.PENDING
+
+
+# endregion
+
+
+# ============================================================
+#                          RESIZE TESTS
+# ============================================================
+# region Resize Tests
+@pytest.fixture
+def resize_cache(tmp_path):
+    with override_settings(NEWS_IMAGE_RESIZE_CACHE_DIR=str(tmp_path)):
+        yield tmp_path
+
+
+@pytest.mark.django_db
+class TestResizeEndpoint:
+    def test_resize_and_cache(self, client, news_item, resize_cache, monkeypatch):
+        """Рендишен создаётся один раз и затем отдаётся из дискового кэша."""
+        url = reverse("news-image-resize", args=[news_item.pk])
+        response = client.get(url, {"w": 40, "format": "jpeg"})
+        assert response.status_code == 200
+        assert response["Content-Type"] == "image/jpeg"
+        with Image.open(BytesIO(b"".join(response.streaming_content))) as img:
+            assert img.size == (40, 40)
+
+        def fail_render(*args):
+            raise AssertionError("Рендишен должен браться из кэша")
+
+        monkeypatch.setattr("news.resize.render", fail_render)
+        cached = client.get(url, {"w": 40, "format": "jpeg"})
+        assert cached.status_code == 200
+        assert cached["ETag"] == response["ETag"]
+        assert len(list(resize_cache.glob("*/*.jpeg"))) == 1
+
+    def test_etag_not_modified(self, client, news_item, resize_cache):
+        """Совпавший If-None-Match возвращает 304 без обращения к кэшу."""
+        url = reverse("news-image-resize", args=[news_item.pk])
+        etag = client.get(url, {"h": 30})["ETag"]
+        response = client.get(url, {"h": 30}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+    @pytest.mark.parametrize(
+        "params",
+        [{}, {"w": "0"}, {"w": "abc"}, {"w": "99999"}, {"w": "10", "format": "gif"}],
+    )
+    def test_invalid_params(self, client, news_item, resize_cache, params):
+        url = reverse("news-image-resize", args=[news_item.pk])
+        assert client.get(url, params).status_code == 400
+
+    @override_settings(
+        NEWS_IMAGE_RESIZE_SENDFILE_HEADER="X-Accel-Redirect",
+        NEWS_IMAGE_RESIZE_SENDFILE_ROOT="/internal/resize/",
+    )
+    def test_sendfile_header(self, client, news_item, resize_cache):
+        """Отдача файла может быть делегирована веб-серверу."""
+        url = reverse("news-image-resize", args=[news_item.pk])
+        response = client.get(url, {"w": 20})
+        assert response.content == b""
+        assert response["X-Accel-Redirect"].startswith("/internal/resize/")
+        assert response["X-Accel-Redirect"].endswith(".webp")
+
+    def test_single_flight(self, news_item, resize_cache, monkeypatch):
+        """Файл, появившийся пока ждали блокировку, не рендерится повторно."""
+        key = rendition_key(news_item.main_image.name, 10, None, "webp")
+        path = rendition_path(key, "webp")
+        real_flock = fcntl.flock
+
+        def flock_after_other_render(fd, operation):
+            path.write_bytes(b"rendered by another worker")
+            real_flock(fd, operation)
+
+        monkeypatch.setattr("news.resize.fcntl.flock", flock_after_other_render)
+        monkeypatch.setattr("news.resize.render", None)
+        assert (
+            get_or_create_rendition(news_item.main_image, key, 10, None, "webp") == path
+        )
+        assert path.read_bytes() == b"rendered by another worker"
+
+    def test_lru_eviction(self, resize_cache):
+        """Вытесняются давно не использованные рендишены."""
+        shard = resize_cache / "ab"
+        shard.mkdir()
+        for age, name in enumerate(("new", "old", "oldest")):
+            path = shard / f"{name}.webp"
+            path.write_bytes(b"x" * 10)
+            os.utime(path, (1000 - age, 1000 - age))
+        (shard / ".lock").touch()
+
+        evict(resize_cache, 20)
+        assert sorted(p.name for p in shard.iterdir()) == [
+            ".lock",
+            "new.webp",
+            "old.webp",
+        ]
+
+    def test_sizes_are_snapped(self):
+        """Размеры округляются вверх до настроенного набора."""
+        assert parse_resize_params({"w": "300"}) == (320, None, "webp")
+        assert parse_resize_params({"w": "2000", "h": "40"}) == (2560, 40, "webp")
 
 
 # endregion
@@ -231,7 +566,87 @@ class TestNewsViews:
         url = reverse("news-list")
         response = api_client.get(url)
         assert response.status_code == 200
-        assert any(item["id"] == news_item.id for item in response.data)
+        assert any(item["id"] == news_item.id for item in response.data["results"])
+        assert "content" not in response.data["results"][0]
+        assert response.data["results"][0]["excerpt"] == news_item.excerpt
+
+    def test_news_list_cursor_pagination(
+        self, api_client, user_a, test_content_file, django_assert_max_num_queries
+    ):
+        """Лента отдаётся страницами по курсору, от новых к старым."""
+        for i in range(3):
+            News.objects.create(
+                title=f"News {i}",
+                content="Content",
+                author=user_a,
+                main_image=test_content_file,
+            )
+        url = reverse("news-list")
+        with django_assert_max_num_queries(1):
+            first_page = api_client.get(url, {"page_size": 2}).data
+        assert [item["title"] for item in first_page["results"]] == [
+            "News 2",
+            "News 1",
+        ]
+        second_page = api_client.get(first_page["next"]).data
+        assert [item["title"] for item in second_page["results"]] == ["News 0"]
+        assert second_page["next"] is None
+
+    def test_sparse_fieldsets(self, api_client, news_item):
+        """Параметр ?fields= ограничивает набор полей в ответе."""
+        response = api_client.get(reverse("news-list"), {"fields": "id,title,bogus"})
+        assert response.data["results"] == [{"id": news_item.id, "title": "Test News"}]
+
+        url = reverse("news-detail", args=[news_item.id])
+        response = api_client.get(url, {"fields": "content"})
+        assert response.data == {"content": news_item.content}
+
+    def test_search_parameter(self, api_client, user_a, test_content_file):
+        """Параметр ?q= ищет по заголовку и анонсу."""
+        for title, content in (
+            ("Weather report", "<p>Sunny</p>"),
+            ("City news", "<p>New <b>weather</b> station</p>"),
+            ("Sports", "<p>Football</p>"),
+        ):
+            News.objects.create(
+                title=title,
+                content=content,
+                author=user_a,
+                main_image=test_content_file,
+            )
+        response = api_client.get(reverse("news-list"), {"q": " WEATHER "})
+        assert sorted(item["title"] for item in response.data["results"]) == [
+            "City news",
+            "Weather report",
+        ]
+        assert response.data["results"][0]["headline"] is None
+
+    def test_ranked_results_are_paginated_by_rank(self):
+        """Результаты поиска листаются по релевантности."""
+        paginator = NewsCursorPagination()
+        ranked = News.objects.annotate(rank=Value(1.0))
+        assert paginator.get_ordering(None, ranked, None) == ("-rank", "-id")
+        assert paginator.get_ordering(None, News.objects.all(), None) == (
+            "-publication_date",
+            "-id",
+        )
+
+    def test_excerpt_is_plain_text(self, default_test_user, test_content_file):
+        """Анонс хранится отдельно, без HTML-разметки и сущностей."""
+        news = News.objects.create(
+            title="Test News",
+            content="<p>Hello&nbsp;<b>world</b></p>\n<p>" + "long " * 100 + "</p>",
+            author=default_test_user,
+            main_image=test_content_file,
+        )
+        assert news.excerpt.startswith("Hello world long long")
+        assert len(news.excerpt) == 300
+        assert "<" not in news.excerpt
+
+        news.content = "<p>Short</p>"
+        news.save(update_fields=["content"])
+        news.refresh_from_db()
+        assert news.excerpt == "Short"
 
     def test_get_news_detail(self, api_client, news_item):
         """Проверка, что GET /news/<id>/ возвращает детали новости."""
@@ -331,27 +746,35 @@ class TestNewsEmailTask:
         )
 
     def test_send_news_email_with_news(
-        self, monkeypatch, user_a, user_b, test_uploaded_file
+        self,
+        monkeypatch,
+        user_a,
+        user_b,
+        test_uploaded_file,
+        django_capture_on_commit_callbacks,
     ):
         """
         Если сегодня опубликованы новости, задача должна отправить письмо,
         содержащее сконфигурированное сообщение и заголовки новостей.
         """
         now_dt = timezone.now()
-        News.objects.create(
-            title="News One",
-            content="Content One",
-            author=user_a,
-            main_image=test_uploaded_file,
-            publication_date=now_dt,
-        )
-        News.objects.create(
-            title="News Two",
-            content="Content Two",
-            author=user_b,
-            main_image=test_uploaded_file,
-            publication_date=now_dt,
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            News.objects.create(
+                title="News One",
+                content="Content One",
+                author=user_a,
+                main_image=test_uploaded_file,
+                publication_date=now_dt,
+            )
+            News.objects.create(
+                title="News Two",
+                content="Content Two",
+                author=user_b,
+                main_image=test_uploaded_file,
+                publication_date=now_dt,
+            )
+        digest = NewsDigest.objects.get(day=timezone.localdate())
+        assert digest.news_count == 2
         monkeypatch.setattr(config, "EMAIL_MESSAGE", "Daily News:")
         monkeypatch.setattr(config, "EMAIL_SUBJECT", "Today's News")
         monkeypatch.setattr(
@@ -359,14 +782,128 @@ class TestNewsEmailTask:
         )
         mail.outbox = []
         send_news_email()
-        assert len(mail.outbox) == 1, "При наличии новостей должно отправляться письмо."
-        email = mail.outbox[0]
-        assert email.subject == "Today's News"
-        expected_message = "Daily News:\n\nNews One\nNews Two"
-        assert email.body == expected_message, "Тело письма сформировано неверно."
-        assert email.from_email == settings.DEFAULT_FROM_EMAIL
-        expected_recipients = ["recipient@example.com", "another@example.com"]
-        assert email.to == expected_recipients
+        assert len(mail.outbox) == 2, "Каждому получателю отправляется своё письмо."
+        for email in mail.outbox:
+            assert email.subject == "Today's News"
+            expected_message = "Daily News:\n\nNews One\nNews Two"
+            assert email.body == expected_message, "Тело письма сформировано неверно."
+            assert email.from_email == settings.DEFAULT_FROM_EMAIL
+        expected_recipients = [["recipient@example.com"], ["another@example.com"]]
+        assert [email.to for email in mail.outbox] == expected_recipients
+
+    @override_settings(NEWS_EMAIL_CHUNK_SIZE=2)
+    def test_send_news_email_in_chunks(self, monkeypatch, news_item):
+        """
+        Получатели делятся на чанки, каждый чанк отправляется через одно
+        SMTP-соединение, а количество доставленных писем учитывается.
+        """
+        cache.clear()
+        monkeypatch.setattr(
+            config,
+            "EMAIL_RECIPIENTS",
+            "a@example.com, b@example.com,,c@example.com,a@example.com",
+        )
+        connections = []
+        real_get_connection = get_connection
+
+        def tracking_get_connection(*args, **kwargs):
+            connections.append(real_get_connection(*args, **kwargs))
+            return connections[-1]
+
+        monkeypatch.setattr("news.tasks.get_connection", tracking_get_connection)
+        mail.outbox = []
+        assert send_news_email() == "Daily news email queued in 2 chunks"
+        assert len(connections) == 2
+        assert sorted(email.to[0] for email in mail.outbox) == [
+            "a@example.com",
+            "b@example.com",
+            "c@example.com",
+        ]
+        assert get_delivery_metrics() == {"sent": 3, "failed": 0, "retried": 0}
+
+    def test_delivery_metrics_view(self, api_client, admin_user):
+        """Счётчики доставки доступны администраторам за выбранный день."""
+        cache.clear()
+        url = reverse("news-email-metrics")
+        assert api_client.get(url).status_code == 403
+
+        api_client.force_authenticate(admin_user)
+        send_news_email_chunk.apply(args=("Subject", "Body", ["a@example.com"]))
+        assert api_client.get(url).json() == {"sent": 1, "failed": 0, "retried": 0}
+        yesterday = timezone.localdate() - datetime.timedelta(days=1)
+        response = api_client.get(url, {"day": yesterday.isoformat()})
+        assert response.json() == {"sent": 0, "failed": 0, "retried": 0}
+        assert api_client.get(url, {"day": "yesterday"}).status_code == 400
+
+    def test_digest_follows_edits_and_deletions(
+        self, news_item, django_capture_on_commit_callbacks
+    ):
+        """
+        Дайджест дня пересобирается при смене заголовка и удалении новости,
+        а без дайджеста задача собирает его по диапазону дат.
+        """
+        today = timezone.localdate()
+        assert not NewsDigest.objects.exists()
+        send_news_email()
+        assert NewsDigest.objects.get(day=today).body == "Test News\n"
+
+        news_item.title = "Renamed"
+        with django_capture_on_commit_callbacks(execute=True):
+            news_item.save()
+        assert NewsDigest.objects.get(day=today).body == "Renamed\n"
+
+        with django_capture_on_commit_callbacks(execute=True):
+            news_item.delete()
+        digest = NewsDigest.objects.get(day=today)
+        assert (digest.body, digest.news_count) == ("", 0)
+        assert send_news_email() is None
+
+    def test_published_on_uses_a_range(self):
+        """Отбор новостей дня не оборачивает publication_date в приведение."""
+        start, end = day_bounds(timezone.localdate())
+        assert end - start == datetime.timedelta(days=1)
+        sql = str(published_on(timezone.localdate()).query)
+        assert "django_datetime_cast_date" not in sql
+        assert "::date" not in sql
+
+    def test_send_news_email_chunk_retries(self, monkeypatch):
+        """
+        Ошибка SMTP повторяет отправку только недоставленным получателям,
+        а исчерпание попыток учитывается.
+        """
+        cache.clear()
+        attempts = []
+
+        class FlakyConnection:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+            def send_messages(self, messages):
+                attempts.append(messages[0].to[0])
+                if len(attempts) == 2:
+                    raise SMTPException("Temporary failure")
+                return len(messages)
+
+        monkeypatch.setattr("news.tasks.get_connection", FlakyConnection)
+        recipients = ["a@example.com", "b@example.com", "c@example.com"]
+        result = send_news_email_chunk.apply(args=("Subject", "Body", recipients))
+        assert result.get() == 2
+        assert attempts == [
+            "a@example.com",
+            "b@example.com",
+            "b@example.com",
+            "c@example.com",
+        ]
+        assert get_delivery_metrics() == {"sent": 3, "failed": 0, "retried": 2}
+
+        attempts.clear()
+        monkeypatch.setattr(send_news_email_chunk, "max_retries", 0)
+        result = send_news_email_chunk.apply(args=("Subject", "Body", recipients))
+        assert isinstance(result.result, SMTPException)
+        assert get_delivery_metrics() == {"sent": 4, "failed": 2, "retried": 2}
 
 
 # endregion
@@ -1,8 +1,16 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import NewsViewSet
+from .views import NewsEmailMetricsView, NewsViewSet
 
 router = DefaultRouter()
 router.register(r"news", NewsViewSet, basename="news")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path(
+        "metrics/news-email/",
+        NewsEmailMetricsView.as_view(),
+        name="news-email-metrics",
+    ),
+    *router.urls,
+]
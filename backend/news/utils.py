@@ -1,5 +1,19 @@
+from html import unescape
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
 from news import models
 
+EXCERPT_LENGTH = 300
+
 
 def upload_to_image(instance: "models.News", filename: str) -> str:
-    return f"news/{instance.pk}/{filename}"
+    """The storage moves the file to its content hash below this directory."""
+    return f"news/{filename}"
+
+
+def make_excerpt(html: str) -> str:
+    """Plain-text start of ``html`` content for list views."""
+    text = " ".join(unescape(strip_tags(html)).split())
+    return Truncator(text).chars(EXCERPT_LENGTH)
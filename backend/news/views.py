@@ -1,8 +1,32 @@
+from config.caching import ConditionalGetMixin, ResponseCacheMixin
+from config.middleware import SerializationTimingMixin
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_safe
 from rest_framework import viewsets
-from rest_framework.permissions import BasePermission, IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import (
+    BasePermission,
+    IsAdminUser,
+    IsAuthenticatedOrReadOnly,
+)
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .filters import NewsSearchFilter
+from .mailing import get_delivery_metrics
 from .models import News
-from .serializers import NewsSerializer
+from .resize import (
+    RESIZE_FORMATS,
+    get_or_create_rendition,
+    parse_resize_params,
+    rendition_key,
+)
+from .pagination import NewsCursorPagination
+from .serializers import NewsListSerializer, NewsSerializer
 
 
 class IsAuthorOrReadOnly(BasePermission):
@@ -10,13 +34,84 @@ class IsAuthorOrReadOnly(BasePermission):
         if request.method in ["GET", "HEAD"]:
             return True
         return request.user and (
-            obj.author == request.user
+            obj.author_id == request.user.id
             or request.user.is_staff
             or request.user.is_superuser
         )
 
 
-class NewsViewSet(viewsets.ModelViewSet):
+class NewsViewSet(
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    SerializationTimingMixin,
+    viewsets.ModelViewSet,
+):
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
-    queryset = News.objects.all()
+    queryset = News.objects.select_related("author")
     serializer_class = NewsSerializer
+    pagination_class = NewsCursorPagination
+    filter_backends = (NewsSearchFilter,)
+    cache_models = (News,)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            queryset = queryset.defer("content")
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return NewsListSerializer
+        return super().get_serializer_class()
+
+
+class NewsEmailMetricsView(APIView):
+    """Sent, failed and retried messages of the daily email on ``?day=``."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        day = None
+        if value := request.query_params.get("day"):
+            try:
+                day = parse_date(value)
+            except ValueError:
+                pass
+            if day is None:
+                raise ValidationError({"day": "Expected a YYYY-MM-DD date."})
+        return Response(get_delivery_metrics(day))
+
+
+@require_safe
+def resize_news_image(request, pk):
+    """
+    Serves ``main_image`` of a news item resized to ``?w=`` and/or ``?h=`` in
+    ``?format=`` (webp or jpeg) from the on-disk rendition cache.
+    """
+    news = get_object_or_404(News.objects.only("main_image"), pk=pk)
+    try:
+        width, height, file_format = parse_resize_params(request.GET)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    key = rendition_key(news.main_image.name, width, height, file_format)
+    etag = f'"{key}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        path = get_or_create_rendition(
+            news.main_image, key, width, height, file_format
+        )
+        content_type = RESIZE_FORMATS[file_format]
+        if header := settings.NEWS_IMAGE_RESIZE_SENDFILE_HEADER:
+            response = HttpResponse(content_type=content_type)
+            response[header] = (
+                f"{settings.NEWS_IMAGE_RESIZE_SENDFILE_ROOT}"
+                f"{path.relative_to(settings.NEWS_IMAGE_RESIZE_CACHE_DIR)}"
+                if settings.NEWS_IMAGE_RESIZE_SENDFILE_ROOT
+                else str(path)
+            )
+        else:
+            response = FileResponse(path.open("rb"), content_type=content_type)
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
@@ -1,24 +1,70 @@
-import datetime
+import io
+from pathlib import Path
 
-import openpyxl
-import xlsxwriter
+from config.routers import replica_reads
 from django.contrib import admin, messages
 from django.contrib.gis.admin import GISModelAdmin
-from django.contrib.gis.geos import Point
-from django.core.exceptions import ValidationError
-from django.http import HttpResponse
+from django.db import transaction
 from django.shortcuts import redirect, render
-from django.urls import path
-
-from .models import Place, WeatherSummary
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .exports import export_response, find_or_create_export_job
+from .filters import search_places
+from .importers import READERS, import_places, load_places, read_xlsx
+from .models import ExportJob, Place, WeatherSummary
+from .tasks import run_export_job
+
+
+class ExportMixin:
+    export_kind = None
+    export_name = None
+
+    def export(self, request, queryset, file_format):
+        # Admin actions are POST requests, which are otherwise not routed.
+        with replica_reads():
+            return export_response(
+                self.export_kind, file_format, queryset, self.export_name
+            )
+
+    def enqueue_export(self, request, queryset, file_format):
+        # Stays on the primary: a fingerprint read from a lagging replica
+        # would match and reuse an export of outdated data.
+        job, created = find_or_create_export_job(
+            self.export_kind, file_format, queryset, request.user
+        )
+        if created:
+            transaction.on_commit(lambda: run_export_job.delay(job.pk))
+
+        jobs_url = reverse("admin:places_exportjob_changelist")
+        if job.status == ExportJob.Status.DONE:
+            message = format_html(
+                'The same export is ready: <a href="{}">download</a>.', job.file.url
+            )
+        else:
+            message = format_html(
+                'Export #{} is in progress, follow it on the <a href="{}">export '
+                "jobs</a> page.",
+                job.pk,
+                jobs_url,
+            )
+        self.message_user(request, message, messages.SUCCESS)
 
 
 @admin.register(Place)
-class PlaceAdmin(GISModelAdmin):
+class PlaceAdmin(ExportMixin, GISModelAdmin):
     list_display = ("name", "rating")
     search_fields = ("name",)
     change_list_template = "admin/places_change_list.html"
-    actions = ("export_xlsx",)
+    actions = (
+        "export_xlsx",
+        "export_csv",
+        "export_geojson",
+        "export_parquet",
+        "export_xlsx_background",
+    )
+    export_kind = ExportJob.Kind.PLACES
+    export_name = "places"
 
     def get_urls(self):
         urls = super().get_urls()
@@ -28,6 +74,11 @@ class PlaceAdmin(GISModelAdmin):
                 self.admin_site.admin_view(self.import_xlsx),
                 name="import-xlsx",
             ),
+            path(
+                "import-bulk/",
+                self.admin_site.admin_view(self.import_bulk),
+                name="import-bulk",
+            ),
         ]
         return custom_urls + urls
 
@@ -35,50 +86,34 @@ class PlaceAdmin(GISModelAdmin):
         if request.method == "POST" and request.FILES.get("xlsx_file"):
             xlsx_file = request.FILES["xlsx_file"]
             try:
-                workbook = openpyxl.load_workbook(xlsx_file)
-                sheet = workbook.active
-                imported_count = 0
-
-                existing_keys = {
-                    (place.name, place.rating, place.location.wkt)
-                    for place in Place.objects.all()
-                }
-
-                existing_keys = {
-                    (place.name, place.rating, place.location.wkt)
-                    for place in Place.objects.all()
-                }
-
-                new_places = []
-                imported_count = 0
-
-                for row in sheet.iter_rows(min_row=2, values_only=True):
-                    name, coord_str, rating = row
-
-                    if None in (name, coord_str, rating):
-                        continue
-
-                    if not (0 <= rating <= 25):
-                        raise ValidationError(
-                            f"Invalid rating {rating}. Must be between 0 and 25."
-                        )
+                tolerance = float(request.POST.get("dedup_tolerance") or 0)
+                imported_count = import_places(
+                    read_xlsx(xlsx_file), tolerance=tolerance
+                )
 
-                    try:
-                        latitude, longitude = map(float, coord_str.split(","))
-                    except ValueError:
-                        raise ValidationError(f"Invalid coordinate format: {coord_str}")
+                self.message_user(
+                    request, f"Imported {imported_count} locations.", messages.SUCCESS
+                )
+                return redirect("..")
 
-                    point = Point(longitude, latitude)
-                    key = (name, rating, point.wkt)
-                    if key in existing_keys:
-                        continue
+            except Exception as e:
+                self.message_user(request, f"Error: {str(e)}", messages.ERROR)
 
-                    new_places.append(Place(name=name, location=point, rating=rating))
-                    imported_count += 1
-                    existing_keys.add(key)
+        return render(request, "admin/import_xlsx.html", {})
 
-                if new_places:
-                    Place.objects.bulk_create(new_places)
+    def import_bulk(self, request):
+        if request.method == "POST" and request.FILES.get("bulk_file"):
+            bulk_file = request.FILES["bulk_file"]
+            file_format = Path(bulk_file.name).suffix.lstrip(".").lower()
+            if file_format == "json":
+                file_format = "geojson"
+            try:
+                if file_format not in READERS:
+                    raise ValueError(f"Unsupported file format: {file_format}")
+                text_file = io.TextIOWrapper(
+                    bulk_file.file, encoding="utf-8-sig", newline=""
+                )
+                imported_count = load_places(READERS[file_format](text_file))
 
                 self.message_user(
                     request, f"Imported {imported_count} locations.", messages.SUCCESS
@@ -88,41 +123,37 @@ class PlaceAdmin(GISModelAdmin):
             except Exception as e:
                 self.message_user(request, f"Error: {str(e)}", messages.ERROR)
 
-        return render(request, "admin/import_xlsx.html", {})
+        return render(request, "admin/import_bulk.html", {})
+
+    def get_search_results(self, request, queryset, search_term):
+        return search_places(queryset, search_term), False
 
     def import_xlsx_button(self):
         return '<a href="import-xlsx/" class="button">Import data from XLSX</a>'
 
     @admin.action(description="Export selected places to XLSX")
     def export_xlsx(self, request, queryset):
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        filename = (
-            f"places_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.xlsx"
-        )
-        response["Content-Disposition"] = f"attachment; filename={filename}"
+        return self.export(request, queryset, ExportJob.Format.XLSX)
 
-        workbook = xlsxwriter.Workbook(response, {"in_memory": True})
-        worksheet = workbook.add_worksheet("Places")
+    @admin.action(description="Export selected places to CSV")
+    def export_csv(self, request, queryset):
+        return self.export(request, queryset, ExportJob.Format.CSV)
 
-        headers = ("Name", "Coordinates", "Rating")
-        for col_num, header in enumerate(headers):
-            worksheet.write(0, col_num, header)
+    @admin.action(description="Export selected places to GeoJSON")
+    def export_geojson(self, request, queryset):
+        return self.export(request, queryset, ExportJob.Format.GEOJSON)
 
-        row = 1
-        for place in queryset:
-            worksheet.write(row, 0, place.name)
-            worksheet.write(row, 1, f"{place.location.x}, {place.location.y}")
-            worksheet.write(row, 2, place.rating)
-            row += 1
+    @admin.action(description="Export selected places to Parquet")
+    def export_parquet(self, request, queryset):
+        return self.export(request, queryset, ExportJob.Format.PARQUET)
 
-        workbook.close()
-        return response
+    @admin.action(description="Export selected places to XLSX in background")
+    def export_xlsx_background(self, request, queryset):
+        self.enqueue_export(request, queryset, ExportJob.Format.XLSX)
 
 
 @admin.register(WeatherSummary)
-class WeatherSummaryAdmin(admin.ModelAdmin):
+class WeatherSummaryAdmin(ExportMixin, admin.ModelAdmin):
     list_display = (
         "place",
         "timestamp",
@@ -132,10 +163,18 @@ class WeatherSummaryAdmin(admin.ModelAdmin):
         "wind_direction",
         "wind_speed",
     )
+    list_select_related = ("place",)
     list_filter = ("place", "timestamp")
     date_hierarchy = "timestamp"
-    actions = ["export_to_xlsx"]
+    actions = [
+        "export_to_xlsx",
+        "export_to_csv",
+        "export_to_parquet",
+        "export_to_xlsx_background",
+    ]
     readonly_fields = [field.name for field in WeatherSummary._meta.fields]
+    export_kind = ExportJob.Kind.WEATHER
+    export_name = "weather_summary"
 
     def has_add_permission(self, request):
         return False
@@ -148,39 +187,55 @@ class WeatherSummaryAdmin(admin.ModelAdmin):
 
     @admin.action(description="Export selected weather summaries to XLSX")
     def export_to_xlsx(self, request, queryset):
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        filename = f"weather_summary_{
-            datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        }.xlsx"
-        response["Content-Disposition"] = f"attachment; filename={filename}"
-
-        workbook = xlsxwriter.Workbook(response, {"in_memory": True})
-        worksheet = workbook.add_worksheet("Weather report")
-
-        headers = [
-            "Place",
-            "Time",
-            "Temperature (°C)",
-            "Humidity (%)",
-            "Pressure (mmHg)",
-            "Wind direction",
-            "Wind speed (m/s)",
-        ]
-        for col_num, header in enumerate(headers):
-            worksheet.write(0, col_num, header)
-
-        row = 1
-        for weather in queryset:
-            worksheet.write(row, 0, weather.place.name)
-            worksheet.write(row, 1, weather.timestamp.strftime("%Y-%m-%d %H:%M:%S"))
-            worksheet.write(row, 2, weather.temperature)
-            worksheet.write(row, 3, weather.humidity)
-            worksheet.write(row, 4, weather.pressure)
-            worksheet.write(row, 5, weather.wind_direction)
-            worksheet.write(row, 6, weather.wind_speed)
-            row += 1
-
-        workbook.close()
-        return response
+        return self.export(request, queryset, ExportJob.Format.XLSX)
+
+    @admin.action(description="Export selected weather summaries to CSV")
+    def export_to_csv(self, request, queryset):
+        return self.export(request, queryset, ExportJob.Format.CSV)
+
+    @admin.action(description="Export selected weather summaries to Parquet")
+    def export_to_parquet(self, request, queryset):
+        return self.export(request, queryset, ExportJob.Format.PARQUET)
+
+    @admin.action(
+        description="Export selected weather summaries to XLSX in background"
+    )
+    def export_to_xlsx_background(self, request, queryset):
+        self.enqueue_export(request, queryset, ExportJob.Format.XLSX)
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "__str__",
+        "status",
+        "progress",
+        "download",
+        "requested_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("kind", "file_format", "status")
+    list_select_related = ("requested_by",)
+    exclude = ("query",)
+    readonly_fields = [
+        field.name for field in ExportJob._meta.fields if field.name != "query"
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Progress")
+    def progress(self, obj):
+        if obj.status == ExportJob.Status.DONE:
+            return f"{obj.total_rows} rows"
+        return f"{obj.rows_written} / {obj.total_rows}"
+
+    @admin.display(description="File")
+    def download(self, obj):
+        if obj.status != ExportJob.Status.DONE or not obj.file:
+            return "-"
+        return format_html('<a href="{}">download</a>', obj.file.url)
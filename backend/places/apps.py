@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class PlacesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "places"
+
+    def ready(self):
+        from config.caching import invalidate_on_change
+
+        import places.signals  # noqa: F401
+
+        from .models import Place, WeatherSummary
+
+        invalidate_on_change(Place, WeatherSummary)
+        return super().ready()
@@ -0,0 +1,130 @@
+import datetime
+
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_safe
+
+from .fast import json_float, render_json
+from .filters import search_places
+from .models import Place, WeatherSummary
+from .views import PlaceViewSet, WeatherViewSet
+
+NEARBY_RADIUS_M = 1000
+NEARBY_MAX_RADIUS_M = 100_000
+NEARBY_LIMIT = 100
+
+# Rows are rendered exactly like the fast list path of the sync viewsets.
+place_row = PlaceViewSet().fast_list_row
+weather_row = WeatherViewSet().fast_list_row
+timestamp_field = WeatherViewSet.timestamp_field
+
+
+def json_response(data) -> HttpResponse:
+    return HttpResponse(render_json(data), content_type="application/json")
+
+
+def parse_float(params, name: str, default=None) -> float:
+    value = params.get(name, default)
+    if value is None:
+        raise ValueError(f"The {name} parameter is required.")
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"The {name} parameter must be a number.")
+
+
+def parse_timestamp(params, name: str) -> datetime.datetime | None:
+    if not (value := params.get(name)):
+        return None
+    if (timestamp := parse_datetime(value)) is None:
+        raise ValueError(f"The {name} parameter must be an ISO 8601 datetime.")
+    return timestamp
+
+
+@require_safe
+async def place_list(request):
+    """Async counterpart of ``GET /api/places/``, including ``?search=``."""
+    queryset = search_places(Place.objects.all(), request.GET.get("search", ""))
+    rows = queryset.values_list(*PlaceViewSet.fast_list_fields)
+    return json_response([place_row(row) async for row in rows])
+
+
+@require_safe
+async def place_nearby(request):
+    """
+    Places within ``?radius=`` metres (1 km by default) of ``?lon=`` and
+    ``?lat=``, nearest first.
+    """
+    try:
+        point = Point(
+            parse_float(request.GET, "lon"), parse_float(request.GET, "lat")
+        )
+        radius = parse_float(request.GET, "radius", NEARBY_RADIUS_M)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    if not 0 < radius <= NEARBY_MAX_RADIUS_M:
+        return HttpResponseBadRequest(
+            f"The radius must be between 0 and {NEARBY_MAX_RADIUS_M} metres."
+        )
+
+    rows = (
+        Place.objects.filter(location__distance_lte=(point, D(m=radius)))
+        .annotate(distance=Distance("location", point))
+        .order_by("distance", "pk")
+        .values_list(*PlaceViewSet.fast_list_fields, "distance")[:NEARBY_LIMIT]
+    )
+    return json_response(
+        [
+            place_row(row) | {"distance": json_float(distance.m)}
+            async for *row, distance in rows
+        ]
+    )
+
+
+@require_safe
+async def weather_list(request):
+    """Async counterpart of ``GET /api/weather/``, optionally by ``?place=``."""
+    queryset = WeatherSummary.objects.all()
+    if place := request.GET.get("place"):
+        if not place.isdigit():
+            return HttpResponseBadRequest("The place parameter must be an id.")
+        queryset = queryset.filter(place_id=place)
+    rows = queryset.values_list(*WeatherViewSet.fast_list_fields)
+    return json_response([weather_row(row) async for row in rows])
+
+
+@require_safe
+async def weather_series(request, place_id):
+    """
+    Readings of one place in chronological order, limited to the optional
+    ``?since=`` and ``?until=`` timestamps.
+    """
+    try:
+        since = parse_timestamp(request.GET, "since")
+        until = parse_timestamp(request.GET, "until")
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    queryset = WeatherSummary.objects.filter(place_id=place_id)
+    if since:
+        queryset = queryset.filter(timestamp__gte=since)
+    if until:
+        queryset = queryset.filter(timestamp__lt=until)
+    rows = queryset.order_by("timestamp").values_list(
+        "timestamp", "temperature", "humidity", "pressure", "wind_speed"
+    )
+    return json_response(
+        [
+            {
+                "timestamp": timestamp_field.to_representation(timestamp),
+                "temperature": json_float(temperature),
+                "humidity": humidity,
+                "pressure": pressure,
+                "wind_speed": json_float(wind_speed),
+            }
+            async for timestamp, temperature, humidity, pressure, wind_speed in rows
+        ]
+    )
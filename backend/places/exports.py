@@ -0,0 +1,318 @@
+import csv
+import datetime
+import hashlib
+import io
+import json
+import pickle
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from itertools import batched
+from typing import NamedTuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+from django.conf import settings
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.db.models import Count, Max, Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import ExportJob
+
+CHUNK_SIZE = 2000
+CONTENT_TYPES = {
+    ExportJob.Format.XLSX: (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    ),
+    ExportJob.Format.CSV: "text/csv; charset=utf-8",
+    ExportJob.Format.GEOJSON: "application/geo+json",
+    ExportJob.Format.PARQUET: "application/vnd.apache.parquet",
+}
+STREAMED_FORMATS = (ExportJob.Format.CSV, ExportJob.Format.GEOJSON)
+
+PLACE_HEADERS = ("Name", "Coordinates", "Rating")
+WEATHER_HEADERS = (
+    "Place",
+    "Time",
+    "Temperature (°C)",
+    "Humidity (%)",
+    "Pressure (mmHg)",
+    "Wind direction",
+    "Wind speed (m/s)",
+)
+PLACE_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("name", pa.string()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("rating", pa.int16()),
+    ]
+)
+WEATHER_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("place_id", pa.int64()),
+        ("place", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("temperature", pa.float64()),
+        ("humidity", pa.int16()),
+        ("pressure", pa.int16()),
+        ("wind_direction", pa.string()),
+        ("wind_speed", pa.float64()),
+    ]
+)
+
+
+def place_rows(queryset) -> Iterator[tuple]:
+    rows = queryset.values_list("name", "location", "rating")
+    for name, location, rating in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield name, f"{location.x}, {location.y}", rating
+
+
+def weather_rows(queryset) -> Iterator[tuple]:
+    rows = queryset.values_list(
+        "place__name",
+        "timestamp",
+        "temperature",
+        "humidity",
+        "pressure",
+        "wind_direction",
+        "wind_speed",
+    )
+    for place_name, timestamp, *values in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield place_name, timestamp.strftime("%Y-%m-%d %H:%M:%S"), *values
+
+
+def place_records(queryset) -> Iterator[tuple]:
+    rows = queryset.values_list("id", "name", "location", "rating")
+    for pk, name, location, rating in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield pk, name, location.y, location.x, rating
+
+
+def weather_records(queryset) -> Iterator[tuple]:
+    rows = queryset.values_list(
+        "id",
+        "place_id",
+        "place__name",
+        "timestamp",
+        "temperature",
+        "humidity",
+        "pressure",
+        "wind_direction",
+        "wind_speed",
+    )
+    return rows.iterator(chunk_size=CHUNK_SIZE)
+
+
+def place_features(queryset) -> Iterator[tuple]:
+    rows = queryset.annotate(geometry=AsGeoJSON("location")).values_list(
+        "id", "name", "rating", "geometry"
+    )
+    return rows.iterator(chunk_size=CHUNK_SIZE)
+
+
+class ExportSpec(NamedTuple):
+    sheet_name: str
+    headers: tuple
+    xlsx_rows: Callable
+    schema: pa.Schema
+    records: Callable
+    features: Callable | None
+    version_fields: tuple[str, ...]
+
+
+EXPORTS = {
+    ExportJob.Kind.PLACES: ExportSpec(
+        "Places",
+        PLACE_HEADERS,
+        place_rows,
+        PLACE_SCHEMA,
+        place_records,
+        place_features,
+        ("updated_at",),
+    ),
+    ExportJob.Kind.WEATHER: ExportSpec(
+        "Weather report",
+        WEATHER_HEADERS,
+        weather_rows,
+        WEATHER_SCHEMA,
+        weather_records,
+        None,
+        ("pk", "place__updated_at"),
+    ),
+}
+
+
+def write_xlsx(output, sheet_name: str, headers: tuple, rows: Iterable[tuple]):
+    """
+    Writes rows to ``output`` in xlsxwriter's ``constant_memory`` mode, so
+    only the current row is kept in memory.
+    """
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    worksheet = workbook.add_worksheet(sheet_name)
+
+    worksheet.write_row(0, 0, headers)
+    for row_num, row in enumerate(rows, start=1):
+        worksheet.write_row(row_num, 0, row)
+
+    workbook.close()
+
+
+def write_parquet(output, schema: pa.Schema, records: Iterable[tuple]):
+    """Writes one Parquet row group per ``CHUNK_SIZE`` records."""
+    with pq.ParquetWriter(output, schema) as writer:
+        for batch in batched(records, CHUNK_SIZE):
+            columns = zip(*batch)
+            writer.write_table(
+                pa.Table.from_arrays(
+                    [
+                        pa.array(column, type=field.type)
+                        for column, field in zip(columns, schema)
+                    ],
+                    schema=schema,
+                )
+            )
+
+
+def iter_csv(columns: Iterable[str], records: Iterable[tuple]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batched(records, CHUNK_SIZE):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def iter_geojson(features: Iterable[tuple]) -> Iterator[bytes]:
+    """
+    Streams a FeatureCollection of ``(id, name, rating, geometry)`` rows,
+    where ``geometry`` is already GeoJSON rendered by the database.
+    """
+    yield b'{"type":"FeatureCollection","features":['
+    separator = ""
+    for batch in batched(features, CHUNK_SIZE):
+        chunk = ",".join(
+            f'{{"type":"Feature","id":{pk},"geometry":{geometry},"properties":'
+            f"{json.dumps({'name': name, 'rating': rating}, ensure_ascii=False)}}}"
+            for pk, name, rating, geometry in batch
+        )
+        yield (separator + chunk).encode()
+        separator = ","
+    yield b"]}"
+
+
+def stream_export(
+    spec: ExportSpec, file_format: str, queryset, progress=iter
+) -> Iterator[bytes]:
+    if file_format == ExportJob.Format.CSV:
+        return iter_csv(spec.schema.names, progress(spec.records(queryset)))
+    if file_format == ExportJob.Format.GEOJSON and spec.features is not None:
+        return iter_geojson(progress(spec.features(queryset)))
+    raise ValueError(f"Format {file_format} can not be streamed.")
+
+
+def write_export(spec: ExportSpec, file_format: str, queryset, output, progress=iter):
+    if file_format == ExportJob.Format.XLSX:
+        rows = progress(spec.xlsx_rows(queryset))
+        write_xlsx(output, spec.sheet_name, spec.headers, rows)
+    elif file_format == ExportJob.Format.PARQUET:
+        write_parquet(output, spec.schema, progress(spec.records(queryset)))
+    else:
+        for chunk in stream_export(spec, file_format, queryset, progress):
+            output.write(chunk)
+
+
+def export_response(kind: str, file_format: str, queryset, name: str):
+    """
+    Returns ``queryset`` exported as an attachment. CSV and GeoJSON are
+    streamed as they are generated, XLSX and Parquet are written to a
+    temporary file first.
+    """
+    spec = EXPORTS[kind]
+    # Bind the routed database now, streaming outlives the routing context.
+    queryset = queryset.using(queryset.db)
+    filename = (
+        f"{name}_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+        f".{file_format}"
+    )
+    if file_format in STREAMED_FORMATS:
+        response = StreamingHttpResponse(
+            stream_export(spec, file_format, queryset),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    output = tempfile.TemporaryFile()
+    write_export(spec, file_format, queryset, output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=filename,
+        content_type=CONTENT_TYPES[file_format],
+    )
+
+
+def data_version(kind: str, queryset) -> str:
+    """
+    Cheap fingerprint of the exported data: the row count plus the latest
+    ``updated_at`` for places, or the latest pk of the immutable weather rows
+    and the latest ``updated_at`` of their places, whose names are exported.
+    """
+    version = queryset.order_by().aggregate(
+        Count("pk"), *(Max(field) for field in EXPORTS[kind].version_fields)
+    )
+    return ":".join(str(value) for value in version.values())
+
+
+def export_fingerprint(kind: str, file_format: str, queryset) -> str:
+    raw = "|".join(
+        (kind, file_format, str(queryset.query), data_version(kind, queryset))
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def find_or_create_export_job(
+    kind: str, file_format: str, queryset, user=None
+) -> tuple[ExportJob, bool]:
+    """
+    Returns a job exporting ``queryset`` and whether it was just created.
+
+    A finished job with the same filters and data version is reused as long
+    as its file is still in storage, as is a job that is still in progress,
+    unless it was created over ``EXPORT_JOB_STALE_SECONDS`` ago and its
+    worker has probably died.
+    """
+    fingerprint = export_fingerprint(kind, file_format, queryset)
+    stale_before = timezone.now() - datetime.timedelta(
+        seconds=settings.EXPORT_JOB_STALE_SECONDS
+    )
+    jobs = ExportJob.objects.filter(
+        Q(status=ExportJob.Status.DONE)
+        | Q(
+            status__in=(ExportJob.Status.PENDING, ExportJob.Status.RUNNING),
+            created_at__gte=stale_before,
+        ),
+        fingerprint=fingerprint,
+    )
+    for job in jobs:
+        if job.status != ExportJob.Status.DONE or job.file.storage.exists(
+            job.file.name
+        ):
+            return job, False
+
+    job = ExportJob.objects.create(
+        kind=kind,
+        file_format=file_format,
+        query=pickle.dumps(queryset.query),
+        fingerprint=fingerprint,
+        requested_by=user if user and user.is_authenticated else None,
+    )
+    return job, True
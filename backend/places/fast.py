@@ -0,0 +1,65 @@
+import json
+
+import orjson
+from config.middleware import measure_serialization
+from django.conf import settings
+from django.db.models import FloatField, Func
+from django.http import HttpResponse
+
+
+class X(Func):
+    function = "ST_X"
+    arity = 1
+    output_field = FloatField()
+
+
+class Y(Func):
+    function = "ST_Y"
+    arity = 1
+    output_field = FloatField()
+
+
+def json_float(value: float | None):
+    """
+    Returns ``value`` so that orjson renders it exactly like ``json.dumps``,
+    which differs only in the exponent notation of very small or big floats.
+    """
+    if value is None or value == 0 or 1e-4 <= abs(value) < 1e16:
+        return value
+    return orjson.Fragment(json.dumps(value).encode())
+
+
+def render_json(data) -> bytes:
+    """Renders ``data`` byte-compatible with DRF's compact ``JSONRenderer``."""
+    return (
+        orjson.dumps(data)
+        .replace(b"\xe2\x80\xa8", b"\\u2028")
+        .replace(b"\xe2\x80\xa9", b"\\u2029")
+    )
+
+
+class FastListMixin:
+    """
+    Opt-in list path (``FAST_LIST_SERIALIZATION``) that reads
+    ``fast_list_fields`` with ``values_list`` and renders rows built by
+    ``fast_list_row`` with orjson, bypassing the serializer machinery.
+    """
+
+    fast_list_fields = ()
+
+    def fast_list_row(self, row) -> dict:
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        if (
+            not settings.FAST_LIST_SERIALIZATION
+            or request.accepted_renderer.format != "json"
+            or self.paginator is not None
+        ):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*self.fast_list_fields)
+        with measure_serialization():
+            content = render_json([self.fast_list_row(row) for row in rows])
+        return HttpResponse(content, content_type="application/json")
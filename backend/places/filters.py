@@ -0,0 +1,37 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Upper
+from rest_framework.filters import SearchFilter
+
+
+def search_places(queryset, term: str):
+    """
+    Filters places whose name is similar to or contains ``term``, ranked by
+    trigram similarity. Both lookups use the ``pg_trgm`` GIN index on
+    ``UPPER(name)``; other databases fall back to a plain ``icontains``.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.filter(name__icontains=term)
+
+    term = term.upper()
+    return (
+        queryset.annotate(
+            search_name=Upper("name"),
+            similarity=TrigramSimilarity(Upper("name"), term),
+        )
+        .filter(Q(search_name__trigram_similar=term) | Q(name__icontains=term))
+        .order_by("-similarity", "pk")
+    )
+
+
+class PlaceSearchFilter(SearchFilter):
+    """``?search=`` parameter backed by :func:`search_places`."""
+
+    def filter_queryset(self, request, queryset, view):
+        return search_places(
+            queryset, request.query_params.get(self.search_param, "")
+        )
@@ -0,0 +1,338 @@
+import csv
+import io
+import json
+import math
+import re
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from itertools import batched
+
+import openpyxl
+from config.caching import bump_version
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from .models import Place
+
+BATCH_SIZE = 1000
+EARTH_RADIUS_M = 6_371_008.8
+METRES_PER_DEGREE = 111_320.0
+# GeoJSON is parsed as a whole, larger loads should use CSV, which is streamed.
+GEOJSON_MAX_CHARS = 50 * 1024 * 1024
+
+
+def validate_rating(rating) -> int:
+    """Returns ``rating`` as an integer between 0 and 25."""
+    try:
+        rating = int(rating)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Invalid rating {rating}.")
+    if not (0 <= rating <= 25):
+        raise ValidationError(f"Invalid rating {rating}. Must be between 0 and 25.")
+    return rating
+
+
+def read_xlsx(xlsx_file) -> Iterator[Place]:
+    workbook = openpyxl.load_workbook(xlsx_file, read_only=True)
+    sheet = workbook.active
+
+    for row in sheet.iter_rows(min_row=2, values_only=True):
+        name, coord_str, rating = row
+
+        if None in (name, coord_str, rating):
+            continue
+
+        rating = validate_rating(rating)
+
+        try:
+            latitude, longitude = map(float, coord_str.split(","))
+        except ValueError:
+            raise ValidationError(f"Invalid coordinate format: {coord_str}")
+
+        yield Place(name=name, location=Point(longitude, latitude), rating=rating)
+
+    workbook.close()
+
+
+def parse_coordinate(value, label: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Invalid {label}: {value}")
+
+
+def read_csv(text_file) -> Iterator[tuple[str, float, float, int]]:
+    """Yields ``(name, longitude, latitude, rating)`` rows of a CSV file."""
+    reader = csv.DictReader(text_file)
+    missing = {"name", "latitude", "longitude", "rating"} - set(
+        reader.fieldnames or ()
+    )
+    if missing:
+        raise ValidationError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+
+    for row in reader:
+        if not row["name"] or not row["rating"]:
+            continue
+        rating = validate_rating(row["rating"])
+        yield (
+            row["name"],
+            parse_coordinate(row["longitude"], "longitude"),
+            parse_coordinate(row["latitude"], "latitude"),
+            rating,
+        )
+
+
+def read_geojson(text_file) -> Iterator[tuple[str, float, float, int]]:
+    """
+    Yields ``(name, longitude, latitude, rating)`` rows of a FeatureCollection
+    of at most ``GEOJSON_MAX_CHARS`` characters.
+    """
+    content = text_file.read(GEOJSON_MAX_CHARS + 1)
+    if len(content) > GEOJSON_MAX_CHARS:
+        raise ValidationError(
+            f"GeoJSON files are limited to {GEOJSON_MAX_CHARS // 1024 // 1024} MB, "
+            "load larger files as CSV."
+        )
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ValidationError(f"Invalid GeoJSON: {e}")
+
+    for feature in data.get("features", ()):
+        geometry = feature.get("geometry") or {}
+        properties = feature.get("properties") or {}
+        if geometry.get("type") != "Point":
+            continue
+        name, rating = properties.get("name"), properties.get("rating")
+        if name is None or rating is None:
+            continue
+        rating = validate_rating(rating)
+        longitude, latitude = geometry["coordinates"][:2]
+        yield (
+            name,
+            parse_coordinate(longitude, "longitude"),
+            parse_coordinate(latitude, "latitude"),
+            rating,
+        )
+
+
+READERS = {
+    "csv": read_csv,
+    "geojson": read_geojson,
+}
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", name).casefold().split())
+
+
+def distance_m(a: Point, b: Point) -> float:
+    lon1, lat1, lon2, lat2 = map(math.radians, (a.x, a.y, b.x, b.y))
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(h)))
+
+
+class GridIndex:
+    """In-memory grid of places bucketed by cells of ``tolerance`` metres."""
+
+    def __init__(self, tolerance: float):
+        self.tolerance = tolerance
+        self.cell_size = tolerance / METRES_PER_DEGREE
+        self._cells = defaultdict(list)
+
+    def cell(self, point: Point) -> tuple[int, int]:
+        return (
+            math.floor(point.x / self.cell_size),
+            math.floor(point.y / self.cell_size),
+        )
+
+    def lon_span(self, latitude: float) -> int:
+        cos_lat = max(math.cos(math.radians(min(abs(latitude) + 1, 90))), 0.01)
+        return math.ceil(1 / cos_lat)
+
+    def add(self, place: Place) -> None:
+        self._cells[self.cell(place.location)].append(place)
+
+    def nearby(self, point: Point) -> Iterator[Place]:
+        cx, cy = self.cell(point)
+        span = self.lon_span(point.y)
+        for x in range(cx - span, cx + span + 1):
+            for y in range(cy - 1, cy + 2):
+                for place in self._cells.get((x, y), ()):
+                    if distance_m(point, place.location) <= self.tolerance:
+                        yield place
+
+    def search_area(self, points: Iterable[Point]) -> MultiPolygon:
+        polygons = {}
+        for point in points:
+            cx, cy = self.cell(point)
+            if (cx, cy) in polygons:
+                continue
+            span = self.lon_span(point.y)
+            polygons[cx, cy] = Polygon.from_bbox(
+                (
+                    (cx - span) * self.cell_size,
+                    (cy - 1) * self.cell_size,
+                    (cx + span + 1) * self.cell_size,
+                    (cy + 2) * self.cell_size,
+                )
+            )
+        return MultiPolygon(*polygons.values(), srid=4326)
+
+
+def drop_nearby_duplicates(places: list[Place], tolerance: float) -> list[Place]:
+    """
+    Drops places that lie within ``tolerance`` metres of a stored place or of
+    an earlier place in ``places`` with the same normalized name.
+
+    Stored candidates are fetched with a single spatial query for the batch.
+    """
+    if not places:
+        return places
+
+    index = GridIndex(tolerance)
+    area = index.search_area(place.location for place in places)
+    for place in Place.objects.filter(location__intersects=area).only(
+        "name", "location"
+    ):
+        index.add(place)
+
+    unique_places = []
+    for place in places:
+        name = normalize_name(place.name)
+        if any(
+            normalize_name(candidate.name) == name
+            for candidate in index.nearby(place.location)
+        ):
+            continue
+        index.add(place)
+        unique_places.append(place)
+    return unique_places
+
+
+def import_places(places: Iterable[Place], tolerance: float | None = None) -> int:
+    """
+    Saves new places in batches and returns the number of imported ones.
+
+    Duplicates are detected by ``Place.dedup_key`` against the current batch
+    and the unique index, so the cost depends on the imported rows only.
+    With ``tolerance`` (in metres) places with the same normalized name that
+    are closer than that to a known place are merged into it as well.
+    """
+    imported_count = 0
+
+    with transaction.atomic():
+        transaction.on_commit(lambda: bump_version(Place))
+        for batch in batched(places, BATCH_SIZE):
+            candidates = {}
+            for place in batch:
+                place.dedup_key = place.get_dedup_key()
+                candidates.setdefault(place.dedup_key, place)
+
+            existing_keys = set(
+                Place.objects.filter(dedup_key__in=candidates).values_list(
+                    "dedup_key", flat=True
+                )
+            )
+            new_places = [
+                place
+                for key, place in candidates.items()
+                if key not in existing_keys
+            ]
+            if tolerance:
+                new_places = drop_nearby_duplicates(new_places, tolerance)
+
+            Place.objects.bulk_create(new_places, ignore_conflicts=True)
+            imported_count += len(new_places)
+
+    return imported_count
+
+
+class CopyStream:
+    """File-like object feeding CSV lines to ``COPY ... FROM STDIN``."""
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk.encode()
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def iter_copy_chunks(rows) -> Iterator[str]:
+    for batch in batched(rows, BATCH_SIZE):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for name, longitude, latitude, rating in batch:
+            writer.writerow(
+                (
+                    name,
+                    repr(longitude),
+                    repr(latitude),
+                    rating,
+                    Place.make_dedup_key(name, rating, longitude, latitude),
+                )
+            )
+        yield buffer.getvalue()
+
+
+def copy_rows(cursor, sql: str, chunks: Iterator[str]) -> None:
+    if hasattr(cursor, "copy_expert"):
+        cursor.copy_expert(sql, CopyStream(chunks))
+        return
+    with cursor.copy(sql) as copy:
+        for chunk in chunks:
+            copy.write(chunk)
+
+
+def load_places(rows) -> int:
+    """
+    Loads ``(name, longitude, latitude, rating)`` rows and returns the number
+    of inserted places.
+
+    On PostgreSQL the rows are streamed into a temporary staging table with
+    ``COPY`` and merged into the places table with a single
+    ``INSERT ... ON CONFLICT DO NOTHING``. Other backends fall back to
+    :func:`import_places`.
+    """
+    if connection.vendor != "postgresql":
+        return import_places(
+            Place(name=name, location=Point(longitude, latitude), rating=rating)
+            for name, longitude, latitude, rating in rows
+        )
+
+    table = Place._meta.db_table
+    staging = f"{table}_staging"
+    with transaction.atomic(), connection.cursor() as cursor:
+        transaction.on_commit(lambda: bump_version(Place))
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging} ("
+            "name varchar(255), longitude double precision, "
+            "latitude double precision, rating smallint, dedup_key varchar(64)"
+            ") ON COMMIT DROP"
+        )
+        copy_rows(
+            cursor,
+            f"COPY {staging} FROM STDIN WITH (FORMAT csv)",
+            iter_copy_chunks(rows),
+        )
+        cursor.execute(
+            f"INSERT INTO {table} (name, location, rating, dedup_key, updated_at) "
+            "SELECT name, ST_SetSRID(ST_MakePoint(longitude, latitude), 4326), "
+            f"rating, dedup_key, now() FROM {staging} "
+            "ON CONFLICT (dedup_key) DO NOTHING"
+        )
+        return cursor.rowcount
@@ -0,0 +1,75 @@
+import asyncio
+import statistics
+import time
+
+import aiohttp
+from django.core.management.base import BaseCommand, CommandError
+
+# The async views have no response cache and run the same code under both
+# servers, WSGI through async_to_sync, so only the server model differs.
+ENDPOINTS = {
+    "places": "/api/async/places/",
+    "weather": "/api/async/weather/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends the same concurrent requests to the same endpoint on a WSGI "
+        "and an ASGI server and compares throughput and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi", default="http://localhost:8000")
+        parser.add_argument("--asgi", default="http://localhost:8001")
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="places")
+        parser.add_argument(
+            "--path",
+            help="Other path to load instead, DRF endpoints need both servers "
+            "to run with API_CACHE_TIMEOUT=0.",
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+
+    def handle(self, *args, **options):
+        path = options["path"] or ENDPOINTS[options["endpoint"]]
+        for name, url in (
+            ("wsgi", options["wsgi"] + path),
+            ("asgi", options["asgi"] + path),
+        ):
+            try:
+                elapsed, latencies = asyncio.run(
+                    self.load(url, options["requests"], options["concurrency"])
+                )
+            except aiohttp.ClientError as e:
+                raise CommandError(f"{name}: {url} failed: {e}")
+            latencies.sort()
+            self.stdout.write(
+                f"{name}: {len(latencies) / elapsed:.1f} req/s, "
+                f"median {statistics.median(latencies) * 1000:.1f} ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms"
+            )
+
+    async def load(self, url, count, concurrency):
+        latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+        headers = {"Accept": "application/json"}
+
+        async def fetch(session):
+            async with semaphore:
+                start = time.perf_counter()
+                async with session.get(url, headers=headers) as response:
+                    response.raise_for_status()
+                    if response.headers.get("X-Cache") == "HIT":
+                        raise CommandError(
+                            f"{url} is served from the response cache, run the "
+                            "servers with API_CACHE_TIMEOUT=0."
+                        )
+                    await response.read()
+                latencies.append(time.perf_counter() - start)
+
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            start = time.perf_counter()
+            await asyncio.gather(*(fetch(session) for _ in range(count)))
+            return time.perf_counter() - start, latencies
@@ -0,0 +1,80 @@
+import random
+import time
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from places.models import Place, WeatherSummary
+from places.views import PlaceViewSet, WeatherViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the serializer and the fast list path of the places and "
+        "weather endpoints on generated rows that are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.create_rows(options["rows"])
+            self.benchmark("places", PlaceViewSet, options["repeat"])
+            self.benchmark("weather", WeatherViewSet, options["repeat"])
+            transaction.set_rollback(True)
+
+    def create_rows(self, count):
+        places = Place.objects.bulk_create(
+            Place(
+                name=f"Benchmark place {i}",
+                location=Point(random.uniform(-180, 180), random.uniform(-90, 90)),
+                rating=random.randint(0, 25),
+                dedup_key=f"benchmark-{i}",
+            )
+            for i in range(count)
+        )
+        WeatherSummary.objects.bulk_create(
+            WeatherSummary(
+                place=place,
+                temperature=random.uniform(-40, 40),
+                humidity=random.randint(0, 100),
+                pressure=random.randint(700, 800),
+                wind_direction=str(random.randint(0, 359)),
+                wind_speed=random.uniform(0, 30),
+            )
+            for place in places
+        )
+
+    def render(self, viewset, fast):
+        request = APIRequestFactory().get("/", HTTP_ACCEPT="application/json")
+        view = viewset.as_view({"get": "list"})
+        # Without the response cache every run after the first would be a hit.
+        with override_settings(FAST_LIST_SERIALIZATION=fast, API_CACHE_TIMEOUT=0):
+            start = time.perf_counter()
+            response = view(request)
+            if hasattr(response, "render"):
+                response.render()
+            return time.perf_counter() - start, response.content
+
+    def benchmark(self, name, viewset, repeat):
+        results = {}
+        for fast in (False, True):
+            timings = []
+            for _ in range(repeat):
+                elapsed, content = self.render(viewset, fast)
+                timings.append(elapsed)
+            results[fast] = (min(timings), content)
+
+        (slow, slow_content), (fast, fast_content) = results[False], results[True]
+        if slow_content != fast_content:
+            raise CommandError(f"{name}: the fast list output differs.")
+        self.stdout.write(
+            f"{name}: serializer {slow * 1000:.1f} ms, fast path "
+            f"{fast * 1000:.1f} ms, speedup x{slow / fast:.1f}, "
+            f"{len(fast_content)} bytes identical"
+        )
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from places.importers import READERS, load_places
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk load places from a CSV or GeoJSON file. GeoJSON is parsed in "
+        "memory and limited to 50 MB, CSV is streamed and has no limit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="File format, detected from the extension by default.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format == "json":
+            file_format = "geojson"
+        if file_format not in READERS:
+            raise CommandError(f"Unsupported file format: {file_format}")
+
+        try:
+            with path.open(encoding="utf-8-sig", newline="") as text_file:
+                imported_count = load_places(READERS[file_format](text_file))
+        except (OSError, ValidationError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {imported_count} locations.")
+        )
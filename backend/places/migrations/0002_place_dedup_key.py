@@ -0,0 +1,79 @@
+# Generated by Django 5.1.6 on 2026-10-19 10:12
+
+import hashlib
+import logging
+
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def merge_duplicates(Place, WeatherSummary, duplicates):
+    """
+    Moves the readings of duplicates to the place that is kept and deletes
+    them. This can not be reversed, so every merge is logged.
+    """
+    for kept_pk, duplicate_pks in duplicates.items():
+        logger.warning(
+            "Merged duplicate places %s into place %s.", duplicate_pks, kept_pk
+        )
+        WeatherSummary.objects.filter(place_id__in=duplicate_pks).update(
+            place_id=kept_pk
+        )
+        Place.objects.filter(pk__in=duplicate_pks).delete()
+
+
+def fill_dedup_keys(apps, schema_editor):
+    Place = apps.get_model("places", "Place")
+    WeatherSummary = apps.get_model("places", "WeatherSummary")
+    kept = {}
+    duplicates = {}
+    batch = []
+    for place in Place.objects.order_by("pk").iterator(chunk_size=1000):
+        raw = (
+            f"{place.name}|{place.rating}|"
+            f"{float(place.location.x)!r}|{float(place.location.y)!r}"
+        )
+        key = hashlib.sha256(raw.encode()).hexdigest()
+        if key in kept:
+            # Every place needs a key, so later duplicates are merged into
+            # the oldest one instead of being left without it.
+            duplicates.setdefault(kept[key], []).append(place.pk)
+            continue
+        kept[key] = place.pk
+        place.dedup_key = key
+        batch.append(place)
+        if len(batch) >= 1000:
+            Place.objects.bulk_update(batch, ["dedup_key"])
+            batch = []
+    Place.objects.bulk_update(batch, ["dedup_key"])
+    merge_duplicates(Place, WeatherSummary, duplicates)
+
+
+def check_constraints_now(apps, schema_editor):
+    # The merge leaves deferred foreign key checks pending, and PostgreSQL
+    # refuses to alter a table with pending trigger events.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='dedup_key',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(fill_dedup_keys, migrations.RunPython.noop),
+        migrations.RunPython(check_constraints_now, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='place',
+            name='dedup_key',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0002_place_dedup_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Updated at'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('places', 'Places'), ('weather', 'Weather summary')], max_length=20, verbose_name='Kind')),
+                ('file_format', models.CharField(choices=[('xlsx', 'XLSX')], default='xlsx', max_length=10, verbose_name='Format')),
+                ('query', models.BinaryField(verbose_name='Pickled query')),
+                ('fingerprint', models.CharField(db_index=True, max_length=64, verbose_name='Fingerprint')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='Status')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Total rows')),
+                ('rows_written', models.PositiveIntegerField(default=0, verbose_name='Rows written')),
+                ('file', models.FileField(blank=True, upload_to='exports/', verbose_name='File')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished at')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export job',
+                'verbose_name_plural': 'Export jobs',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0003_place_updated_at_exportjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='file_format',
+            field=models.CharField(choices=[('xlsx', 'XLSX'), ('csv', 'CSV'), ('geojson', 'GeoJSON'), ('parquet', 'Parquet')], default='xlsx', max_length=10, verbose_name='Format'),
+        ),
+    ]
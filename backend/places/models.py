@@ -1,4 +1,9 @@
+import hashlib
+import pickle
+
+from django.conf import settings
 from django.contrib.gis.db import models as gis_models
+from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import timezone
@@ -14,10 +19,43 @@ class Place(models.Model):
         help_text="From 0 to 25",
         validators=[MinValueValidator(0), MaxValueValidator(25)],
     )
+    dedup_key = models.CharField(max_length=64, unique=True, null=True, editable=False)
+    updated_at = models.DateTimeField("Updated at", auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.rating}) at {self.location.x}, {self.location.y}"
 
+    @staticmethod
+    def make_dedup_key(
+        name: str, rating: int, longitude: float, latitude: float
+    ) -> str:
+        raw = f"{name}|{rating}|{float(longitude)!r}|{float(latitude)!r}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get_dedup_key(self) -> str:
+        return self.make_dedup_key(
+            self.name, self.rating, self.location.x, self.location.y
+        )
+
+    def clean(self):
+        super().clean()
+        if self.name is None or self.rating is None or self.location is None:
+            return
+        # The stored key covers every field it is built from, so an unchanged
+        # place is recognised without a query.
+        dedup_key = self.get_dedup_key()
+        if not self._state.adding and dedup_key == self.dedup_key:
+            return
+        duplicates = Place.objects.filter(dedup_key=dedup_key)
+        if duplicates.exclude(pk=self.pk).exists():
+            raise ValidationError("Such a place already exists.")
+
+    def save(self, *args, **kwargs):
+        self.dedup_key = self.get_dedup_key()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "dedup_key"}
+        super().save(*args, **kwargs)
+
 
 class WeatherSummary(models.Model):
     place = models.ForeignKey(
@@ -41,3 +79,57 @@ class WeatherSummary(models.Model):
 
     def __str__(self):
         return f"{self.place.name} at {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+
+
+class ExportJob(models.Model):
+    class Kind(models.TextChoices):
+        PLACES = "places", "Places"
+        WEATHER = "weather", "Weather summary"
+
+    class Format(models.TextChoices):
+        XLSX = "xlsx", "XLSX"
+        CSV = "csv", "CSV"
+        GEOJSON = "geojson", "GeoJSON"
+        PARQUET = "parquet", "Parquet"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    kind = models.CharField("Kind", max_length=20, choices=Kind.choices)
+    file_format = models.CharField(
+        "Format", max_length=10, choices=Format.choices, default=Format.XLSX
+    )
+    query = models.BinaryField("Pickled query")
+    fingerprint = models.CharField("Fingerprint", max_length=64, db_index=True)
+    status = models.CharField(
+        "Status", max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    total_rows = models.PositiveIntegerField("Total rows", default=0)
+    rows_written = models.PositiveIntegerField("Rows written", default=0)
+    file = models.FileField("File", upload_to="exports/", blank=True)
+    error = models.TextField("Error", blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField("Created at", auto_now_add=True)
+    finished_at = models.DateTimeField("Finished at", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Export job"
+        verbose_name_plural = "Export jobs"
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.file_format})"
+
+    @property
+    def model(self):
+        return {self.Kind.PLACES: Place, self.Kind.WEATHER: WeatherSummary}[self.kind]
+
+    def get_queryset(self):
+        queryset = self.model.objects.all()
+        queryset.query = pickle.loads(self.query)
+        return queryset
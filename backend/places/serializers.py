@@ -36,7 +36,21 @@ class PlaceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Place
         geo_field = "location"
-        fields = "__all__"
+        exclude = ("dedup_key", "updated_at")
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        name = attrs.get("name", getattr(self.instance, "name", None))
+        rating = attrs.get("rating", getattr(self.instance, "rating", None))
+        location = attrs.get("location", getattr(self.instance, "location", None))
+        duplicates = Place.objects.filter(
+            dedup_key=Place.make_dedup_key(name, rating, location.x, location.y)
+        )
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError("Such a place already exists.")
+        return attrs
 
 
 class WeatherSummarySerializer(serializers.ModelSerializer):
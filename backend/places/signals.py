@@ -0,0 +1,13 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import ExportJob
+
+
+@receiver(post_delete, sender=ExportJob)
+def export_job_post_delete(sender, instance, **kwargs):
+    if instance.file:
+        transaction.on_commit(partial(instance.file.delete, save=False))
@@ -1,10 +1,17 @@
 import asyncio
+import datetime
+import tempfile
 
 from asgiref.sync import sync_to_async
 from celery import shared_task
+from config.routers import replica_reads
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections
 from django.utils import timezone
 
-from .models import Place, WeatherSummary
+from .exports import CHUNK_SIZE, EXPORTS, write_export
+from .models import ExportJob, Place, WeatherSummary
 from .utils import get_weather
 
 
@@ -33,6 +40,65 @@ def fetch_weather_summary():
         for idx, result in enumerate(results):
             if isinstance(result, Exception):
                 print(f"Error for place {places[idx].pk}: {result}")
+        # The ORM calls above share one executor thread that no request or
+        # task hook cleans up, so recycle its connection here.
+        await sync_to_async(close_old_connections)()
 
     asyncio.run(main())
     return f"Weather summary tasks dispatched at {timezone.now()}"
+
+
+def track_progress(job: ExportJob, rows):
+    for rows_written, row in enumerate(rows, start=1):
+        yield row
+        if rows_written % CHUNK_SIZE == 0:
+            ExportJob.objects.filter(pk=job.pk).update(rows_written=rows_written)
+
+
+@shared_task
+def delete_old_export_jobs() -> int:
+    """
+    Deletes export jobs created over ``EXPORT_RETENTION_DAYS`` ago with their
+    files, including the ones superseded by newer data versions.
+    """
+    cutoff = timezone.now() - datetime.timedelta(days=settings.EXPORT_RETENTION_DAYS)
+    deleted, _ = ExportJob.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+@shared_task
+def run_export_job(job_id: int):
+    job = ExportJob.objects.get(pk=job_id)
+    with replica_reads():
+        queryset = job.get_queryset()
+        queryset = queryset.using(queryset.db)
+
+    job.status = ExportJob.Status.RUNNING
+    job.total_rows = queryset.count()
+    job.save(update_fields=("status", "total_rows"))
+
+    try:
+        with tempfile.TemporaryFile() as output:
+            write_export(
+                EXPORTS[job.kind],
+                job.file_format,
+                queryset,
+                output,
+                progress=lambda rows: track_progress(job, rows),
+            )
+            output.seek(0)
+            filename = (
+                f"{job.kind}_{timezone.now():%Y-%m-%d_%H-%M-%S}.{job.file_format}"
+            )
+            job.file.save(filename, File(output), save=False)
+    except Exception as exc:
+        job.status = ExportJob.Status.FAILED
+        job.error = str(exc)
+    else:
+        job.status = ExportJob.Status.DONE
+        job.rows_written = job.total_rows
+    job.finished_at = timezone.now()
+    job.save(
+        update_fields=("status", "error", "file", "rows_written", "finished_at")
+    )
+    return f"Export job {job.pk} finished with status {job.status}"
@@ -1,18 +1,58 @@
+import importlib
+import json
 from datetime import timedelta
+from io import BytesIO, StringIO
 
 import aiohttp
+import openpyxl
+import pyarrow.parquet as pq
 import pytest
 from asgiref.sync import sync_to_async
+from config.caching import get_cache_metrics
+from django.apps import apps as django_apps
+from django.contrib import admin
 from django.contrib.gis.geos import Point
+from django.core.cache import cache
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAdminUser
 from rest_framework.test import APIClient
 
-from .models import Place, WeatherSummary
+from .admin import PlaceAdmin
+from .exports import (
+    PLACE_HEADERS,
+    WEATHER_HEADERS,
+    data_version,
+    export_response,
+    find_or_create_export_job,
+    place_rows,
+    weather_rows,
+)
+from .fast import json_float, render_json
+from .importers import (
+    CopyStream,
+    GridIndex,
+    distance_m,
+    import_places,
+    iter_copy_chunks,
+    load_places,
+    normalize_name,
+    read_csv,
+    read_geojson,
+    read_xlsx,
+)
+from .models import ExportJob, Place, WeatherSummary
 from .serializers import LocationField, PlaceSerializer, WeatherSummarySerializer
-from .tasks import fetch_weather_summary, process_weather_for_place_async
+from .tasks import (
+    delete_old_export_jobs,
+    fetch_weather_summary,
+    process_weather_for_place_async,
+    run_export_job,
+)
 from .utils import get_weather
 from .views import PlaceViewSet
 
@@ -49,6 +89,18 @@ class FakeClientSession:
         return FakeResponse(self._json)
 
 
+def make_xlsx(rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(("Name", "Coordinates", "Rating"))
+    for row in rows:
+        sheet.append(row)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
 # endregion
 
 
@@ -85,6 +137,32 @@ class TestPlaceViewSet:
             "Create action should use IsAdminUser permission."
         )
 
+    @pytest.mark.django_db
+    def test_search_parameter(self, api_client, create_place):
+        create_place(name="Central Park")
+        create_place(name="Park Avenue", x=1.0)
+        create_place(name="Museum", x=2.0)
+
+        response = api_client.get("/api/places/", {"search": " park "})
+        assert response.status_code == 200
+        assert sorted(p["name"] for p in response.json()) == [
+            "Central Park",
+            "Park Avenue",
+        ]
+        assert len(api_client.get("/api/places/", {"search": ""}).json()) == 3
+
+    @pytest.mark.django_db
+    def test_admin_uses_place_search(self, create_place):
+        create_place(name="Central Park")
+        create_place(name="Museum", x=2.0)
+        model_admin = PlaceAdmin(Place, admin.site)
+
+        queryset, may_have_duplicates = model_admin.get_search_results(
+            None, Place.objects.all(), "PARK"
+        )
+        assert [p.name for p in queryset] == ["Central Park"]
+        assert may_have_duplicates is False
+
 
 # endregion
 
@@ -511,3 +589,596 @@ class TestGetWeather:
 
 
 # endregion
+
+
+# ============================================================
+#                          IMPORTERS TESTS
+# ============================================================
+# region Importers Tests
+class TestImportPlaces:
+    @pytest.mark.django_db
+    def test_skips_existing_and_repeated_rows(self, create_place):
+        create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        xlsx = make_xlsx(
+            [
+                ("Cafe X", "55.03, 82.92", 5),
+                ("Park", "55.01, 82.9", 10),
+                ("Park", "55.01, 82.9", 10),
+                (None, "55.0, 82.0", 1),
+            ]
+        )
+        assert import_places(read_xlsx(xlsx)) == 1
+        assert Place.objects.filter(name="Park").count() == 1
+        assert not Place.objects.filter(dedup_key__isnull=True).exists()
+
+    @pytest.mark.django_db
+    def test_invalid_row_rolls_back(self):
+        xlsx = make_xlsx([("Park", "55.01, 82.9", 10), ("Bad", "55.0, 82.0", 30)])
+        with pytest.raises(DjangoValidationError, match="Invalid rating 30"):
+            import_places(read_xlsx(xlsx))
+        assert not Place.objects.exists()
+
+    @pytest.mark.django_db
+    def test_invalid_coordinates(self):
+        xlsx = make_xlsx([("Park", "north", 10)])
+        with pytest.raises(DjangoValidationError, match="Invalid coordinate format"):
+            import_places(read_xlsx(xlsx))
+
+    @pytest.mark.django_db
+    def test_tolerance_merges_nearby_places(self, create_place):
+        create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        xlsx = make_xlsx(
+            [
+                ("cafe  x!", "55.03001, 82.92", 7),
+                ("Park", "55.03001, 82.92", 7),
+                ("Cafe X", "55.04, 82.92", 5),
+                ("Park", "55.03002, 82.92001", 7),
+            ]
+        )
+        assert import_places(read_xlsx(xlsx), tolerance=50) == 2
+        assert set(Place.objects.values_list("name", flat=True)) == {
+            "Cafe X",
+            "Park",
+        }
+        assert Place.objects.filter(name="Cafe X").count() == 2
+
+    @pytest.mark.django_db
+    def test_without_tolerance_keeps_nearby_places(self, create_place):
+        create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        xlsx = make_xlsx([("Cafe X", "55.03001, 82.92", 5)])
+        assert import_places(read_xlsx(xlsx)) == 1
+
+
+class TestFuzzyHelpers:
+    def test_normalize_name(self):
+        assert normalize_name("  Café   X!! ") == "café x"
+
+    def test_distance_m(self):
+        assert distance_m(Point(82.92, 55.03), Point(82.92, 55.03001)) == (
+            pytest.approx(1.11, abs=0.01)
+        )
+
+    def test_grid_index_nearby(self):
+        index = GridIndex(tolerance=100)
+        near = Place(name="a", location=Point(82.92, 55.03))
+        far = Place(name="b", location=Point(82.93, 55.03))
+        index.add(near)
+        index.add(far)
+        assert list(index.nearby(Point(82.9215, 55.03))) == [near]
+
+
+class TestBulkLoader:
+    CSV = (
+        "name,latitude,longitude,rating\n"
+        "Cafe X,55.03,82.92,5\n"
+        "Park,55.01,82.9,10\n"
+        ",55.0,82.0,1\n"
+    )
+
+    def test_read_csv(self):
+        rows = list(read_csv(StringIO(self.CSV)))
+        assert rows == [("Cafe X", 82.92, 55.03, 5), ("Park", 82.9, 55.01, 10)]
+
+    def test_read_csv_missing_columns(self):
+        with pytest.raises(DjangoValidationError, match="Missing CSV columns: rating"):
+            list(read_csv(StringIO("name,latitude,longitude\n")))
+
+    def test_read_csv_invalid_values(self):
+        with pytest.raises(DjangoValidationError, match="Invalid rating 30"):
+            list(read_csv(StringIO("name,latitude,longitude,rating\nA,1,2,30\n")))
+        with pytest.raises(DjangoValidationError, match="Invalid rating five"):
+            list(read_csv(StringIO("name,latitude,longitude,rating\nA,1,2,five\n")))
+        with pytest.raises(DjangoValidationError, match="Invalid latitude: north"):
+            list(read_csv(StringIO("name,latitude,longitude,rating\nA,north,2,3\n")))
+
+    def test_read_geojson(self):
+        data = {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [82.92, 55.03]},
+                    "properties": {"name": "Cafe X", "rating": 5},
+                },
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [82.9, 55.01]},
+                    "properties": {"name": "Park", "rating": "10"},
+                },
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "LineString", "coordinates": []},
+                    "properties": {"name": "Road", "rating": 1},
+                },
+            ],
+        }
+        rows = list(read_geojson(StringIO(json.dumps(data))))
+        assert rows == [("Cafe X", 82.92, 55.03, 5), ("Park", 82.9, 55.01, 10)]
+        with pytest.raises(DjangoValidationError, match="Invalid GeoJSON"):
+            list(read_geojson(StringIO("{")))
+
+    def test_read_geojson_invalid_rating(self):
+        feature = {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [82.92, 55.03]},
+            "properties": {"name": "Cafe X", "rating": "five"},
+        }
+        data = json.dumps({"type": "FeatureCollection", "features": [feature]})
+        with pytest.raises(DjangoValidationError, match="Invalid rating five"):
+            list(read_geojson(StringIO(data)))
+
+    def test_read_geojson_size_limit(self, monkeypatch):
+        monkeypatch.setattr("places.importers.GEOJSON_MAX_CHARS", 10)
+        data = json.dumps({"type": "FeatureCollection", "features": []})
+        with pytest.raises(DjangoValidationError, match="load larger files as CSV"):
+            list(read_geojson(StringIO(data)))
+
+    def test_copy_stream(self):
+        rows = [("Cafe, X", 82.92, 55.03, 5)]
+        stream = CopyStream(iter_copy_chunks(rows))
+        key = Place.make_dedup_key("Cafe, X", 5, 82.92, 55.03)
+        assert stream.read(4) == b'"Caf'
+        assert stream.read() == f'e, X",82.92,55.03,5,{key}\r\n'.encode()
+        assert stream.read() == b""
+
+    @pytest.mark.django_db
+    def test_load_places_fallback(self, create_place):
+        create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        assert load_places(read_csv(StringIO(self.CSV))) == 1
+        assert Place.objects.count() == 2
+
+    @pytest.mark.django_db
+    def test_load_places_command(self, tmp_path):
+        path = tmp_path / "places.csv"
+        path.write_text(self.CSV)
+        out = StringIO()
+        call_command("load_places", str(path), stdout=out)
+        assert "Imported 2 locations." in out.getvalue()
+        with pytest.raises(CommandError, match="Unsupported file format: txt"):
+            call_command("load_places", str(tmp_path / "places.txt"))
+
+
+class TestPlaceDedupKey:
+    @pytest.mark.django_db
+    def test_key_follows_changes(self, create_place):
+        place = create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        assert place.dedup_key == Place.make_dedup_key("Cafe X", 5, 82.92, 55.03)
+        place.rating = 6
+        place.save(update_fields=["rating"])
+        place.refresh_from_db()
+        assert place.dedup_key == Place.make_dedup_key("Cafe X", 6, 82.92, 55.03)
+
+    @pytest.mark.django_db
+    def test_clean_rejects_duplicate(self, create_place):
+        create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        place = Place(name="Cafe X", rating=5, location=Point(82.92, 55.03))
+        with pytest.raises(DjangoValidationError, match="already exists"):
+            place.full_clean()
+
+    @pytest.mark.django_db
+    def test_clean_skips_unchanged_place(self, create_place, django_assert_num_queries):
+        place = Place.objects.get(pk=create_place(name="Cafe X").pk)
+        with django_assert_num_queries(0):
+            place.clean()
+
+    @pytest.mark.django_db
+    def test_clean_rejects_moving_onto_duplicate(self, create_place):
+        create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        place = create_place(name="Cafe X", rating=5, x=1.0, y=1.0)
+        place.location = Point(82.92, 55.03)
+        with pytest.raises(DjangoValidationError, match="already exists"):
+            place.clean()
+
+    @pytest.mark.django_db
+    def test_serializer_rejects_duplicate(self, create_place):
+        create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        data = {"name": "Cafe X", "location": [82.92, 55.03], "rating": 5}
+        serializer = PlaceSerializer(data=data)
+        assert not serializer.is_valid()
+        assert "non_field_errors" in serializer.errors
+
+    @pytest.mark.django_db
+    def test_migration_merges_duplicates(self, caplog):
+        migration = importlib.import_module("places.migrations.0002_place_dedup_key")
+        kept, duplicate = Place.objects.bulk_create(
+            Place(name="Cafe X", rating=5, location=Point(82.92, 55.03))
+            for _ in range(2)
+        )
+        WeatherSummary.objects.create(
+            place=duplicate,
+            temperature=21.5,
+            humidity=40,
+            pressure=750,
+            wind_direction="NE",
+            wind_speed=3.0,
+        )
+        migration.fill_dedup_keys(django_apps, None)
+
+        assert f"[{duplicate.pk}] into place {kept.pk}" in caplog.text
+        assert list(Place.objects.values_list("pk", flat=True)) == [kept.pk]
+        assert WeatherSummary.objects.get().place_id == kept.pk
+        kept.refresh_from_db()
+        kept.save(update_fields=["rating"])
+        assert kept.dedup_key == Place.make_dedup_key("Cafe X", 5, 82.92, 55.03)
+
+
+# endregion
+
+
+# ============================================================
+#                          EXPORTS TESTS
+# ============================================================
+# region Exports Tests
+@pytest.fixture
+def weather_summary(create_place):
+    place = create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+    return WeatherSummary.objects.create(
+        place=place,
+        temperature=21.5,
+        humidity=40,
+        pressure=750,
+        wind_direction="NE",
+        wind_speed=3.0,
+    )
+
+
+class TestXlsxExport:
+    @pytest.mark.django_db
+    def test_weather_rows_single_query(
+        self, weather_summary, django_assert_num_queries
+    ):
+        with django_assert_num_queries(1):
+            rows = list(weather_rows(WeatherSummary.objects.all()))
+        assert rows == [
+            (
+                "Cafe X",
+                weather_summary.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                21.5,
+                40,
+                750,
+                "NE",
+                3.0,
+            )
+        ]
+
+    @pytest.mark.django_db
+    def test_xlsx_response(self, weather_summary):
+        response = export_response(
+            ExportJob.Kind.WEATHER, "xlsx", WeatherSummary.objects.all(), "weather"
+        )
+        assert response["Content-Disposition"].startswith(
+            'attachment; filename="weather_'
+        )
+        workbook = openpyxl.load_workbook(BytesIO(b"".join(response.streaming_content)))
+        rows = list(workbook["Weather report"].values)
+        assert rows[0] == WEATHER_HEADERS
+        assert rows[1][0] == "Cafe X" and rows[1][2] == 21.5
+
+    @pytest.mark.django_db
+    def test_place_rows(self, create_place):
+        create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        assert list(place_rows(Place.objects.all())) == [("Cafe X", "82.92, 55.03", 5)]
+        assert PLACE_HEADERS == ("Name", "Coordinates", "Rating")
+
+
+class TestExportJobs:
+    @pytest.mark.django_db
+    def test_run_export_job(self, weather_summary):
+        job, created = find_or_create_export_job(
+            ExportJob.Kind.WEATHER, ExportJob.Format.XLSX, WeatherSummary.objects.all()
+        )
+        assert created and job.status == ExportJob.Status.PENDING
+        run_export_job(job.pk)
+        job.refresh_from_db()
+        assert job.status == ExportJob.Status.DONE
+        assert job.total_rows == job.rows_written == 1
+        with job.file.open("rb") as file:
+            rows = list(openpyxl.load_workbook(file)["Weather report"].values)
+        assert rows[1][0] == "Cafe X"
+        job.file.delete(save=False)
+
+    @pytest.mark.django_db
+    def test_identical_export_is_reused(self, create_place):
+        place = create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        queryset = Place.objects.filter(rating=5)
+        job, created = find_or_create_export_job(
+            ExportJob.Kind.PLACES, ExportJob.Format.XLSX, queryset
+        )
+        run_export_job(job.pk)
+        same_job, created = find_or_create_export_job(
+            ExportJob.Kind.PLACES, ExportJob.Format.XLSX, queryset
+        )
+        assert same_job == job and not created
+
+        place.name = "Cafe Y"
+        place.save()
+        new_job, created = find_or_create_export_job(
+            ExportJob.Kind.PLACES, ExportJob.Format.XLSX, queryset
+        )
+        assert created and new_job != job
+        job.file.delete(save=False)
+
+    @pytest.mark.django_db
+    def test_weather_export_follows_place_renames(self, weather_summary):
+        queryset = WeatherSummary.objects.all()
+        version = data_version(ExportJob.Kind.WEATHER, queryset)
+        weather_summary.place.name = "Cafe Y"
+        weather_summary.place.save()
+        assert data_version(ExportJob.Kind.WEATHER, queryset) != version
+
+    @pytest.mark.django_db
+    def test_stale_pending_export_is_not_reused(self, weather_summary, settings):
+        settings.EXPORT_JOB_STALE_SECONDS = 60
+        queryset = WeatherSummary.objects.all()
+        job, _ = find_or_create_export_job(
+            ExportJob.Kind.WEATHER, ExportJob.Format.XLSX, queryset
+        )
+        assert find_or_create_export_job(
+            ExportJob.Kind.WEATHER, ExportJob.Format.XLSX, queryset
+        ) == (job, False)
+
+        ExportJob.objects.filter(pk=job.pk).update(
+            created_at=timezone.now() - timedelta(minutes=2)
+        )
+        new_job, created = find_or_create_export_job(
+            ExportJob.Kind.WEATHER, ExportJob.Format.XLSX, queryset
+        )
+        assert created and new_job != job
+
+    @pytest.mark.django_db
+    def test_old_export_jobs_are_deleted_with_files(
+        self, weather_summary, django_capture_on_commit_callbacks
+    ):
+        queryset = WeatherSummary.objects.all()
+        old, _ = find_or_create_export_job(
+            ExportJob.Kind.WEATHER, ExportJob.Format.CSV, queryset
+        )
+        recent, _ = find_or_create_export_job(
+            ExportJob.Kind.WEATHER, ExportJob.Format.XLSX, queryset
+        )
+        run_export_job(old.pk)
+        old.refresh_from_db()
+        storage, name = old.file.storage, old.file.name
+        ExportJob.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=8)
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert delete_old_export_jobs() == 1
+        assert list(ExportJob.objects.all()) == [recent]
+        assert not storage.exists(name)
+
+    @pytest.mark.django_db
+    def test_failed_export_job(self, weather_summary, monkeypatch):
+        def broken_writer(*args, **kwargs):
+            raise Exception("disk is full")
+
+        monkeypatch.setattr("places.tasks.write_export", broken_writer)
+        job, _ = find_or_create_export_job(
+            ExportJob.Kind.WEATHER, ExportJob.Format.XLSX, WeatherSummary.objects.all()
+        )
+        run_export_job(job.pk)
+        job.refresh_from_db()
+        assert job.status == ExportJob.Status.FAILED
+        assert job.error == "disk is full"
+
+
+class TestColumnarExports:
+    @pytest.mark.django_db
+    def test_places_csv_roundtrip(self, create_place):
+        place = create_place(name="Cafe, X", rating=5, x=82.92, y=55.03)
+        response = export_response(
+            ExportJob.Kind.PLACES, "csv", Place.objects.all(), "places"
+        )
+        content = b"".join(response.streaming_content).decode()
+        assert content == (
+            "id,name,latitude,longitude,rating\r\n"
+            f'{place.pk},"Cafe, X",55.03,82.92,5\r\n'
+        )
+        assert list(read_csv(StringIO(content))) == [("Cafe, X", 82.92, 55.03, 5)]
+
+    @pytest.mark.django_db
+    def test_places_geojson(self, create_place):
+        place = create_place(name="Cafe X", rating=5, x=82.92, y=55.03)
+        response = export_response(
+            ExportJob.Kind.PLACES, "geojson", Place.objects.all(), "places"
+        )
+        assert response["Content-Type"] == "application/geo+json"
+        data = json.loads(b"".join(response.streaming_content))
+        assert data["type"] == "FeatureCollection"
+        feature = data["features"][0]
+        assert feature["id"] == place.pk
+        assert feature["geometry"] == {"type": "Point", "coordinates": [82.92, 55.03]}
+        assert feature["properties"] == {"name": "Cafe X", "rating": 5}
+
+    @pytest.mark.django_db
+    def test_weather_parquet(self, weather_summary):
+        response = export_response(
+            ExportJob.Kind.WEATHER, "parquet", WeatherSummary.objects.all(), "weather"
+        )
+        table = pq.read_table(BytesIO(b"".join(response.streaming_content)))
+        assert table.column_names[:3] == ["id", "place_id", "place"]
+        assert table.to_pylist()[0]["temperature"] == 21.5
+
+    def test_weather_geojson_is_not_supported(self):
+        with pytest.raises(ValueError, match="can not be streamed"):
+            export_response(
+                ExportJob.Kind.WEATHER,
+                "geojson",
+                WeatherSummary.objects.none(),
+                "weather",
+            )
+
+    @pytest.mark.django_db
+    def test_export_endpoints(self, api_client, weather_summary, admin_user):
+        url = reverse("places-export", kwargs={"file_format": "csv"})
+        assert api_client.get(url).status_code == 403
+        assert api_client.get(
+            reverse("weather-export", kwargs={"file_format": "xlsx"})
+        ).status_code == 403
+
+        api_client.force_authenticate(admin_user)
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert b"Cafe X" in b"".join(response.streaming_content)
+
+        url = reverse("weather-export", kwargs={"file_format": "parquet"})
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/vnd.apache.parquet"
+        assert api_client.get("/api/weather/export/geojson/").status_code == 404
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize("url", ["/api/places.geojson", "/api/places/geojson/"])
+    def test_geojson_endpoint(self, api_client, create_place, url):
+        place = create_place(name="Cafe «X»", x=82.92, y=55.03)
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/geo+json"
+        assert "Content-Disposition" not in response
+
+        collection = json.loads(b"".join(response.streaming_content))
+        assert collection["type"] == "FeatureCollection"
+        (feature,) = collection["features"]
+        assert feature["id"] == place.pk
+        assert feature["geometry"]["coordinates"] == [82.92, 55.03]
+        assert feature["properties"] == {"name": "Cafe «X»", "rating": 10}
+
+
+# endregion
+
+
+# ============================================================
+#                          FAST LIST TESTS
+# ============================================================
+# region Fast List Tests
+class TestFastList:
+    def test_json_float_matches_json_module(self):
+        values = [0.0, 1e-05, 0.0001, 82.92, 1e16, -2.5e-07, None]
+        assert (
+            render_json([json_float(v) for v in values])
+            == json.dumps(values, separators=(",", ":")).encode()
+        )
+
+    def test_render_json_escapes_line_separators(self):
+        assert render_json({"name": "a\u2028b"}) == b'{"name":"a\\u2028b"}'
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize("url", ["/api/places/", "/api/weather/"])
+    def test_fast_list_is_byte_compatible(self, api_client, weather_summary, url):
+        Place.objects.create(
+            name="Tiny «place»", location=Point(0.00001, -1e-05), rating=0
+        )
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            expected = api_client.get(url, HTTP_ACCEPT="application/json")
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            response = api_client.get(url, HTTP_ACCEPT="application/json")
+        assert response.status_code == 200
+        assert response["Content-Type"] == expected["Content-Type"]
+        assert response.content == expected.content
+
+    @pytest.mark.django_db
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_list_serialization", rows=20, repeat=1, stdout=out)
+        assert "places: serializer" in out.getvalue()
+        assert "weather: serializer" in out.getvalue()
+
+    @pytest.mark.django_db
+    @override_settings(API_CACHE_TIMEOUT=60)
+    def test_benchmark_bypasses_response_cache(self):
+        cache.clear()
+        call_command(
+            "benchmark_list_serialization", rows=5, repeat=2, stdout=StringIO()
+        )
+        assert get_cache_metrics() == {"hit": 0, "miss": 0, "coalesced": 0}
+
+
+# endregion
+
+
+# ============================================================
+#                          ASYNC VIEWS TESTS
+# ============================================================
+# region Async Views Tests
+@pytest.mark.django_db
+class TestAsyncViews:
+    @pytest.mark.parametrize(
+        "sync_url, async_url",
+        [
+            ("/api/places/", "/api/async/places/"),
+            ("/api/weather/", "/api/async/weather/"),
+        ],
+    )
+    def test_lists_match_sync_endpoints(
+        self, client, api_client, weather_summary, sync_url, async_url
+    ):
+        expected = api_client.get(sync_url, HTTP_ACCEPT="application/json")
+        response = client.get(async_url)
+        assert response.status_code == 200
+        assert response.content == expected.content
+
+    def test_place_list_search(self, client, create_place):
+        create_place(name="Central Park", x=0.0, y=0.0)
+        create_place(name="Harbour", x=1.0, y=1.0)
+        response = client.get(reverse("async-places-list"), {"search": "park"})
+        assert [place["name"] for place in response.json()] == ["Central Park"]
+
+    def test_nearby_places(self, client, create_place):
+        near = create_place(name="Near", x=0.0, y=0.0)
+        create_place(name="Far", x=0.05, y=0.0)
+        response = client.get(
+            reverse("async-places-nearby"), {"lon": 0.001, "lat": 0, "radius": 1000}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [place["id"] for place in data] == [near.pk]
+        assert 100 < data[0]["distance"] < 120
+
+    def test_nearby_places_validates_params(self, client):
+        url = reverse("async-places-nearby")
+        assert client.get(url, {"lat": 0}).status_code == 400
+        assert client.get(url, {"lon": 0, "lat": 0, "radius": -1}).status_code == 400
+
+    def test_weather_series(self, client, weather_summary):
+        place = weather_summary.place
+        WeatherSummary.objects.create(
+            place=place,
+            timestamp=weather_summary.timestamp - timedelta(hours=2),
+            temperature=18.0,
+            humidity=50,
+            pressure=749,
+            wind_direction="N",
+            wind_speed=1.0,
+        )
+        url = reverse("async-weather-series", kwargs={"place_id": place.pk})
+        response = client.get(url)
+        assert [row["temperature"] for row in response.json()] == [18.0, 21.5]
+
+        since = (weather_summary.timestamp - timedelta(hours=1)).isoformat()
+        response = client.get(url, {"since": since})
+        assert [row["temperature"] for row in response.json()] == [21.5]
+        assert client.get(url, {"since": "yesterday"}).status_code == 400
+
+
+# endregion
@@ -1,9 +1,30 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import PlaceViewSet, WeatherViewSet
 
 router = DefaultRouter()
 router.register(r"places", PlaceViewSet, basename="places")
 router.register(r"weather", WeatherViewSet, basename="weather")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path(
+        "places.geojson",
+        PlaceViewSet.as_view({"get": "geojson"}),
+        name="places-geojson-file",
+    ),
+    path("async/places/", async_views.place_list, name="async-places-list"),
+    path(
+        "async/places/nearby/",
+        async_views.place_nearby,
+        name="async-places-nearby",
+    ),
+    path("async/weather/", async_views.weather_list, name="async-weather-list"),
+    path(
+        "async/weather/<int:place_id>/series/",
+        async_views.weather_series,
+        name="async-weather-series",
+    ),
+    *router.urls,
+]
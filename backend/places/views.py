@@ -1,22 +1,123 @@
-from rest_framework import viewsets
+from config.caching import ConditionalGetMixin, ResponseCacheMixin
+from config.middleware import SerializationTimingMixin
+from django.http import StreamingHttpResponse
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
 
-from .models import Place, WeatherSummary
+from .exports import CONTENT_TYPES, EXPORTS, export_response, stream_export
+from .fast import FastListMixin, X, Y, json_float
+from .filters import PlaceSearchFilter
+from .models import ExportJob, Place, WeatherSummary
 from .serializers import PlaceSerializer, WeatherSummarySerializer
 
 
-class PlaceViewSet(viewsets.ModelViewSet):
+class PlaceViewSet(
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    SerializationTimingMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     permission_classes = (IsAuthenticatedOrReadOnly,)
     queryset = Place.objects.all()
     serializer_class = PlaceSerializer
+    filter_backends = (PlaceSearchFilter,)
+    cache_models = (Place,)
+    fast_list_fields = ("id", "name", X("location"), Y("location"), "rating")
+
+    def fast_list_row(self, row):
+        pk, name, x, y, rating = row
+        return {
+            "id": pk,
+            "name": name,
+            "location": [json_float(x), json_float(y)],
+            "rating": rating,
+        }
 
     def get_permissions(self):
-        if self.action in ("create", "update", "partial_update"):
+        if self.action in ("create", "update", "partial_update", "export"):
             self.permission_classes = (IsAdminUser,)
         return super().get_permissions()
 
+    @action(
+        detail=False,
+        url_path=r"export/(?P<file_format>csv|geojson|parquet|xlsx)",
+        url_name="export",
+    )
+    def export(self, request, file_format):
+        """
+        Exports the filtered places. XLSX and Parquet are written in the
+        request, so the action is limited to admins like the export jobs.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(ExportJob.Kind.PLACES, file_format, queryset, "places")
+
+    @action(detail=False, url_path="geojson", url_name="geojson")
+    def geojson(self, request):
+        """
+        Streams every place matching the list filters as a GeoJSON
+        FeatureCollection rendered by the database in server-side chunks.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.using(queryset.db)
+        return StreamingHttpResponse(
+            stream_export(
+                EXPORTS[ExportJob.Kind.PLACES], ExportJob.Format.GEOJSON, queryset
+            ),
+            content_type=CONTENT_TYPES[ExportJob.Format.GEOJSON],
+        )
+
 
-class WeatherViewSet(viewsets.ModelViewSet):
+class WeatherViewSet(
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    SerializationTimingMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = WeatherSummary.objects.all()
+    cache_models = (WeatherSummary,)
     serializer_class = WeatherSummarySerializer
     http_method_names = ("get",)
+    fast_list_fields = (
+        "id",
+        "timestamp",
+        "temperature",
+        "humidity",
+        "pressure",
+        "wind_direction",
+        "wind_speed",
+        "place_id",
+    )
+    timestamp_field = serializers.DateTimeField()
+
+    def fast_list_row(self, row):
+        pk, timestamp, temperature, humidity, pressure, direction, speed, place = row
+        return {
+            "id": pk,
+            "timestamp": self.timestamp_field.to_representation(timestamp),
+            "temperature": json_float(temperature),
+            "humidity": humidity,
+            "pressure": pressure,
+            "wind_direction": direction,
+            "wind_speed": json_float(speed),
+            "place": place,
+        }
+
+    def get_permissions(self):
+        if self.action == "export":
+            self.permission_classes = (IsAdminUser,)
+        return super().get_permissions()
+
+    @action(
+        detail=False,
+        url_path=r"export/(?P<file_format>csv|parquet|xlsx)",
+        url_name="export",
+    )
+    def export(self, request, file_format):
+        """Exports the filtered readings, limited to admins."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(
+            ExportJob.Kind.WEATHER, file_format, queryset, "weather_summary"
+        )
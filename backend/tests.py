@@ -1,11 +1,36 @@
 import importlib
+import json
+import re
 import sys
+import time
 from datetime import datetime, timedelta
 
 import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from config.caching import bump_version, get_cache_metrics, modified_key
+from config.db import pool_metrics
+from config.middleware import RequestMetrics, RequestMetricsMiddleware
+from config.routers import (
+    PIN_COOKIE,
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    pinned_to_primary,
+    replica_reads,
+)
 from config.schedules import EmailCrontabSchedule, WeatherIntervalSchedule
 from constance import config
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from news.models import News
+from places.models import Place
+from places.views import PlaceViewSet
+from rest_framework.test import APIClient
 
 User = get_user_model()
 
@@ -126,3 +151,372 @@ class TestWeatherIntervalSchedule:
         last_run = datetime.now() - timedelta(hours=1, minutes=1)
         schedule.is_due(last_run)
         assert schedule.run_every == timedelta(hours=1)
+
+
+class TestTrackChangesMixin:
+    @pytest.fixture
+    def news(self, db):
+        author = get_user_model().objects.create_user(username="author")
+        return News.objects.create(
+            title="Title", content="Content", author=author, main_image="news/a.jpg"
+        )
+
+    def test_new_instance_has_changed(self):
+        assert News(title="Title", content="Content").has_changed()
+
+    def test_loaded_instance_tracks_changes(self, news, django_assert_num_queries):
+        loaded = News.objects.get(pk=news.pk)
+        with django_assert_num_queries(0):
+            assert not loaded.has_changed()
+            loaded.title = "Other"
+            loaded.main_image = "news/b.jpg"
+            assert loaded.has_changed("title", "main_image")
+            assert not loaded.has_changed("content")
+            assert loaded.get_original("title") == "Title"
+            assert loaded.get_original("main_image") == "news/a.jpg"
+
+    def test_snapshot_is_refreshed_on_save(self, news):
+        news.title = "Other"
+        assert news.has_changed("title")
+        news.save()
+        assert not news.has_changed()
+        assert news.get_original("title") == "Other"
+
+    def test_deferred_fields_count_as_changed(self, news):
+        loaded = News.objects.only("title").get(pk=news.pk)
+        assert not loaded.has_changed("title")
+        assert loaded.has_changed("content")
+        assert loaded.get_original("content") is None
+
+
+@override_settings(API_CACHE_TIMEOUT=60)
+class TestResponseCache:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    def test_response_is_cached_until_version_bump(self, db):
+        Place.objects.create(name="Park", location=Point(1, 2), rating=5)
+        client = APIClient()
+        url = reverse("places-list")
+
+        first = client.get(url)
+        assert first["X-Cache"] == "MISS"
+        Place.objects.create(name="Lake", location=Point(3, 4), rating=4)
+        cached = client.get(url)
+        assert cached["X-Cache"] == "HIT"
+        assert cached.content == first.content
+
+        bump_version(Place)
+        fresh = client.get(url)
+        assert fresh["X-Cache"] == "MISS"
+        assert len(fresh.json()) == 2
+        assert get_cache_metrics() == {"hit": 1, "miss": 2, "coalesced": 0}
+
+    def test_metrics_view_requires_admin(self, admin_user):
+        url = reverse("cache-metrics")
+        assert APIClient().get(url).status_code == 403
+        client = APIClient()
+        client.force_authenticate(admin_user)
+        response = client.get(url)
+        assert response.json() == {"hit": 0, "miss": 0, "coalesced": 0}
+
+    def test_save_bumps_version_on_commit(
+        self, db, django_capture_on_commit_callbacks
+    ):
+        client = APIClient()
+        url = reverse("places-list")
+        client.get(url)
+        with django_capture_on_commit_callbacks(execute=True):
+            Place.objects.create(name="Park", location=Point(1, 2), rating=5)
+        response = client.get(url)
+        assert response["X-Cache"] == "MISS"
+        assert len(response.json()) == 1
+
+    def test_concurrent_miss_waits_for_the_running_request(self, db, monkeypatch):
+        key = "api-cache:response:test"
+        monkeypatch.setattr(
+            PlaceViewSet, "get_response_cache_key", lambda self, request: key
+        )
+        cache.add(f"{key}:lock", 1)
+
+        def finish_other_request(seconds):
+            cache.set(key, (b"[]", "application/json"))
+
+        monkeypatch.setattr("config.caching.time.sleep", finish_other_request)
+        Place.objects.create(name="Park", location=Point(1, 2), rating=5)
+        response = APIClient().get(reverse("places-list"))
+        assert response["X-Cache"] == "HIT"
+        assert response.content == b"[]"
+        assert get_cache_metrics()["coalesced"] == 1
+
+    def test_released_lock_without_result_is_computed(self, db, monkeypatch):
+        key = "api-cache:response:test"
+        monkeypatch.setattr(
+            PlaceViewSet, "get_response_cache_key", lambda self, request: key
+        )
+        cache.add(f"{key}:lock", 1)
+        monkeypatch.setattr(
+            "config.caching.time.sleep", lambda seconds: cache.delete(f"{key}:lock")
+        )
+        response = APIClient().get(reverse("places-list"))
+        assert response["X-Cache"] == "MISS"
+        assert cache.get(key) is not None
+
+    @override_settings(API_CACHE_SHARED=False)
+    def test_local_cache_is_not_used(self, db):
+        response = APIClient().get(reverse("places-list"))
+        assert "X-Cache" not in response and "ETag" not in response
+
+    def test_browsable_api_is_not_cached(self, db):
+        response = APIClient().get(reverse("places-list"), HTTP_ACCEPT="text/html")
+        assert "X-Cache" not in response
+
+
+class TestConditionalGet:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    def test_matching_etag_returns_not_modified(
+        self, db, django_assert_num_queries
+    ):
+        Place.objects.create(name="Park", location=Point(1, 2), rating=5)
+        client = APIClient()
+        url = reverse("places-list")
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response["ETag"]
+
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+        bump_version(Place)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_if_modified_since(self, db):
+        client = APIClient()
+        url = reverse("places-list")
+        last_modified = client.get(url)["Last-Modified"]
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+
+class TestReplicaRouter:
+    @pytest.fixture(autouse=True)
+    def replica(self, monkeypatch):
+        monkeypatch.setitem(
+            settings.DATABASES,
+            "replica",
+            {"ENGINE": "django.contrib.gis.db.backends.spatialite", "NAME": "replica"},
+        )
+
+    def test_reads_use_replica_only_when_requested(self):
+        router = ReplicaRouter()
+        assert router.db_for_read(Place) == "default"
+        with replica_reads():
+            assert router.db_for_read(Place) == "replica"
+            assert router.db_for_write(Place) == "default"
+            with pinned_to_primary():
+                assert router.db_for_read(Place) == "default"
+        assert not router.allow_migrate("replica", "places")
+
+    def test_without_replica_reads_use_default(self, monkeypatch):
+        monkeypatch.delitem(settings.DATABASES, "replica")
+        with replica_reads():
+            assert ReplicaRouter().db_for_read(Place) == "default"
+
+    def test_middleware_pins_client_after_write(self):
+        def view(request):
+            return HttpResponse(ReplicaRouter().db_for_read(Place))
+
+        middleware = ReplicaRoutingMiddleware(view)
+        factory = RequestFactory()
+        assert middleware(factory.get("/")).content == b"replica"
+
+        response = middleware(factory.post("/"))
+        assert response.content == b"default"
+        cookie = response.cookies[PIN_COOKIE]
+        assert cookie["max-age"] == settings.REPLICA_PIN_SECONDS
+
+        request = factory.get("/")
+        request.COOKIES[PIN_COOKIE] = cookie.value
+        assert middleware(request).content == b"default"
+
+    def test_middleware_runs_async(self):
+        async def view(request):
+            return HttpResponse(ReplicaRouter().db_for_read(Place))
+
+        middleware = ReplicaRoutingMiddleware(view)
+        assert iscoroutinefunction(middleware)
+        response = async_to_sync(middleware)(RequestFactory().get("/"))
+        assert response.content == b"replica"
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaDatabase:
+    """Routing against a real second SpatiaLite database."""
+
+    @pytest.fixture
+    def replica(self, transactional_db, tmp_path):
+        # Registered after the test case has set up, so queries are allowed.
+        settings.DATABASES["replica"] = {
+            **connections["default"].settings_dict,
+            "NAME": str(tmp_path / "replica.sqlite3"),
+        }
+        connections.settings["replica"] = settings.DATABASES["replica"]
+        replica = connections["replica"]
+        replica.prepare_database()
+        with replica.schema_editor() as editor:
+            editor.create_model(Place)
+        Place.objects.create(name="Fresh", location=Point(1, 2), rating=5)
+        Place.objects.using("replica").create(
+            name="Stale", location=Point(1, 2), rating=5
+        )
+        yield replica
+        replica.close()
+        del connections["replica"]
+        connections.settings.pop("replica", None)
+        settings.DATABASES.pop("replica", None)
+
+    def names(self):
+        return list(Place.objects.values_list("name", flat=True))
+
+    def test_reads_reach_the_replica(self, replica):
+        assert self.names() == ["Fresh"]
+        with replica_reads():
+            assert self.names() == ["Stale"]
+            with pinned_to_primary():
+                assert self.names() == ["Fresh"]
+
+    def test_safe_requests_read_the_replica(self, replica):
+        response = APIClient().get(reverse("async-places-list"))
+        assert [place["name"] for place in response.json()] == ["Stale"]
+
+    def test_api_reads_the_replica_unless_changed_recently(self, replica):
+        client = APIClient()
+        url = reverse("places-list")
+        caught_up = time.time() - settings.REPLICA_PIN_SECONDS - 1
+        cache.set(modified_key(Place), caught_up, None)
+        response = client.get(url)
+        assert [place["name"] for place in response.json()] == ["Stale"]
+
+        bump_version(Place)
+        response = client.get(url)
+        assert [place["name"] for place in response.json()] == ["Fresh"]
+
+    @override_settings(API_CACHE_TIMEOUT=60)
+    def test_cached_responses_are_read_from_the_primary(self, replica):
+        cache.clear()
+        client = APIClient()
+        url = reverse("places-list")
+        response = client.get(url)
+        assert response["X-Cache"] == "MISS"
+        assert [place["name"] for place in response.json()] == ["Fresh"]
+        cached = client.get(url, HTTP_IF_NONE_MATCH='"other"')
+        assert cached["X-Cache"] == "HIT"
+        assert cached.content == response.content
+
+
+class TestDatabasePoolMetrics:
+    class FakePool:
+        def get_stats(self):
+            return {
+                "pool_max": 10,
+                "pool_size": 4,
+                "pool_available": 1,
+                "requests_num": 8,
+                "requests_wait_ms": 20,
+            }
+
+    class FakeConnection:
+        alias = "default"
+        settings_dict = {"OPTIONS": {"pool": {"max_size": 10}}}
+
+        def __init__(self, pool):
+            self.pool = pool
+
+    class FakeConnections(list):
+        def all(self, initialized_only=False):
+            return self
+
+    def test_pool_metrics(self, monkeypatch):
+        monkeypatch.setattr(
+            "config.db.connections",
+            self.FakeConnections([self.FakeConnection(self.FakePool())]),
+        )
+        metrics = pool_metrics()["default"]
+        assert metrics["in_use"] == 3
+        assert metrics["utilization"] == 0.3
+        assert metrics["avg_wait_ms"] == 2.5
+        assert metrics["requests_waiting"] == 0
+
+    def test_unpooled_databases_are_skipped(self):
+        assert pool_metrics() == {}
+
+    def test_view_requires_admin(self, db):
+        url = reverse("db-pool-metrics")
+        assert APIClient().get(url).status_code in (401, 403)
+        admin = User.objects.create_superuser("root", "root@example.com", "pass")
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.json() == {}
+
+
+class TestRequestMetricsMiddleware:
+    def test_server_timing_header(self, db):
+        Place.objects.create(name="Park", location=Point(1, 2), rating=5)
+        response = APIClient().get(reverse("places-list"))
+        timing = response["Server-Timing"]
+        assert re.search(r'^db;dur=[\d.]+;desc="\d+ queries"', timing)
+        assert "serialize;dur=" in timing
+        assert "render;dur=" in timing
+        assert "total;dur=" in timing
+
+    def test_serializer_data_is_timed(self, db):
+        Place.objects.create(name="Park", location=Point(1, 2), rating=5)
+        view = PlaceViewSet(request=None, format_kwarg=None)
+        metrics = RequestMetrics(keep_queries=False)
+        middleware = RequestMetricsMiddleware(view)
+        request = RequestFactory().get("/")
+        with metrics.instrument(), middleware.activate(request, metrics):
+            data = view.get_serializer(Place.objects.all(), many=True).data
+        assert [place["name"] for place in data] == ["Park"]
+        assert metrics.query_count == 1
+        assert 0 < metrics.serialize_time
+
+    def test_async_requests_are_measured(self, db):
+        async def view(request):
+            await Place.objects.acount()
+            return HttpResponse()
+
+        middleware = RequestMetricsMiddleware(view)
+        assert iscoroutinefunction(middleware)
+        response = async_to_sync(middleware)(RequestFactory().get("/"))
+        assert 'desc="1 queries"' in response["Server-Timing"]
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self, db):
+        response = APIClient().get(reverse("places-list"))
+        assert "Server-Timing" not in response
+
+    @override_settings(REQUEST_SLOW_MS=1)
+    def test_slow_request_logs_queries(self, db, caplog):
+        def view(request):
+            Place.objects.count()
+            time.sleep(0.002)
+            return HttpResponse()
+
+        with caplog.at_level("INFO", logger="config.requests"):
+            RequestMetricsMiddleware(view)(RequestFactory().get("/slow/"))
+        record = json.loads(caplog.records[-1].getMessage())
+        assert caplog.records[-1].levelname == "WARNING"
+        assert record["path"] == "/slow/"
+        assert record["queries"] == 1
+        assert "COUNT" in record["slow_queries"][0]["sql"]